@@ -0,0 +1,173 @@
+import argparse
+import json
+import os
+import sys
+import tracemalloc
+from contextlib import contextmanager
+
+import numpy as np
+import pygame
+
+from background import GradientBackground
+from starfield import Starfield, StarLayer
+from benchmark import SCREEN_SIZE, build_scenario, camera_for
+
+# seeded scenarios (a benchmark.py sweep and count) and the bytes each phase may use per frame,
+# averaged over the measured frames. The peak is the most a phase has live above where it
+# started, short-lived objects and numpy temporaries included; set about 1.5x what was measured
+# so a regression stands out. The net is what a phase leaves behind, and a steady frame leaves
+# next to nothing (the collision grid it keeps is swapped for the next one).
+SCENARIOS = {
+    'default': ('enemies', 12),
+    'enemies': ('enemies', 200),
+    'projectiles': ('projectiles', 240),
+}
+PEAK_BUDGETS = {
+    'default': {'physics': 192_000, 'projectiles': 32_000, 'collision': 16_000, 'step': 192_000, 'draw': 8_000},
+    'enemies': {'physics': 3_300_000, 'projectiles': 96_000, 'collision': 40_000, 'step': 3_300_000, 'draw': 8_000},
+    'projectiles': {'physics': 192_000, 'projectiles': 820_000, 'collision': 16_000, 'step': 820_000, 'draw': 16_000},
+}
+NET_BUDGETS = {'physics': 256, 'projectiles': 256, 'collision': 512, 'step': 512, 'draw': 256}
+
+class AllocationTracker:
+    # stands in for world.timer: every phase(name), including the ones nested inside
+    # world.step, is charged its own peak and net traced bytes. Samples go into arrays made
+    # before tracing starts, so the bookkeeping is not charged to the phases it measures.
+    def __init__(self, frames):
+        self.frames = frames
+        self.samples = {}
+        self.counts = {}
+        self.stack = []
+
+    def reset(self):
+        for name in self.counts:
+            self.counts[name] = 0
+
+    @contextmanager
+    def phase(self, name):
+        current, peak = tracemalloc.get_traced_memory()
+        if self.stack:
+            self.stack[-1][1] = max(self.stack[-1][1], peak)
+        tracemalloc.reset_peak()
+        self.stack.append([current, current])
+        try:
+            yield
+        finally:
+            start, highest = self.stack.pop()
+            current, peak = tracemalloc.get_traced_memory()
+            peak = max(highest, peak)
+            samples = self.samples.get(name)
+            if samples is None:
+                samples = self.samples[name] = np.zeros((self.frames, 2))
+                self.counts[name] = 0
+            count = self.counts[name]
+            if count < self.frames:
+                samples[count] = peak - start, current - start
+                self.counts[name] = count + 1
+            if self.stack:
+                # the enclosing phase saw this peak too, and measures on from here
+                self.stack[-1][1] = max(self.stack[-1][1], peak)
+            tracemalloc.reset_peak()
+
+    def summary(self):
+        result = {}
+        for name, samples in self.samples.items():
+            if not self.counts[name]:
+                continue
+            peak, net = samples[:self.counts[name]].T
+            result[name] = {'peak_bytes': round(float(peak.mean())), 'peak_bytes_max': int(peak.max()),
+                            'net_bytes': round(float(net.mean()))}
+        return result
+
+def measure(sweep, count, seed, frames, warmup, top=0):
+    screen = pygame.display.set_mode(SCREEN_SIZE)
+    world = build_scenario(sweep, count, seed)
+    background = GradientBackground((75, 0, 130), (255, 0, 0), (0, 0, 50), (0, 255, 255), 6)
+    starfield = Starfield([StarLayer(500, 0.25, (-100, -100, 3100, 4000), seed=seed)])
+    inputs = {'shoot', 'refill'}
+    tracker = AllocationTracker(frames)
+    world.timer = tracker
+
+    def frame(number):
+        with tracker.phase('step'):
+            world.step(inputs)
+        camera_offset = camera_for(world)
+        with tracker.phase('background'):
+            background.draw(screen, number * 0.01)
+        with tracker.phase('stars'):
+            starfield.draw(screen, camera_offset)
+        with tracker.phase('draw'):
+            for body in world.visible_bodies(camera_offset.x, camera_offset.y, *SCREEN_SIZE):
+                body.draw(screen, camera_offset)
+
+    # warm caches (text, star tiles, gradients) and the tracker's own arrays before anything is counted
+    for number in range(warmup):
+        frame(number)
+    tracker.reset()
+    tracemalloc.start(25 if top else 1)
+    before = tracemalloc.take_snapshot() if top else None
+    for number in range(warmup, warmup + frames):
+        frame(number)
+    sites = []
+    if top:
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        diff = tracemalloc.take_snapshot().filter_traces(ignore).compare_to(before.filter_traces(ignore), 'lineno')
+        sites = [str(stat) for stat in diff[:top]]
+    tracemalloc.stop()
+    world.timer = None
+    return tracker.summary(), sites
+
+def over_budget(scenario, phases):
+    failures = []
+    for name, measured in phases.items():
+        peak = PEAK_BUDGETS[scenario].get(name)
+        if peak is not None and measured['peak_bytes'] > peak:
+            failures.append(f"{name} peak {measured['peak_bytes']} > {peak} bytes/frame")
+        net = NET_BUDGETS.get(name)
+        if net is not None and measured['net_bytes'] > net:
+            failures.append(f"{name} net {measured['net_bytes']} > {net} bytes/frame")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description="traced allocations of each frame phase over seeded scenarios")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--frames", type=int, default=120)
+    parser.add_argument("--warmup", type=int, default=30)
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), action="append", help="only run the given scenario(s)")
+    parser.add_argument("--top", type=int, default=0, help="also list the N source lines that grew the most")
+    parser.add_argument("--check", action="store_true", help="exit 1 if any phase is over its budget")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    pygame.display.init()
+    pygame.font.init()
+    report = {'seed': args.seed, 'frames': args.frames, 'scenarios': {}}
+    failures = []
+    for name in args.scenario or sorted(SCENARIOS):
+        sweep, count = SCENARIOS[name]
+        phases, sites = measure(sweep, count, args.seed, args.frames, args.warmup, args.top)
+        report['scenarios'][name] = {'phases': phases, 'peak_budgets': PEAK_BUDGETS[name], 'top_sites': sites}
+        problems = over_budget(name, phases)
+        failures += [f"{name}: {problem}" for problem in problems]
+        print(f"{name:>12}: " + ", ".join(f"{phase} {m['peak_bytes'] / 1000:.1f}/{m['net_bytes']}"
+                                         for phase, m in phases.items()) + (" OVER BUDGET" if problems else ""),
+              file=sys.stderr)
+        for site in sites:
+            print(f"    {site}", file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    elif not args.check:
+        print(text)
+    pygame.quit()
+    if args.check and failures:
+        for failure in failures:
+            print(failure, file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    # set here, not at import, so importing this module leaves the video driver alone
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    main()
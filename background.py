@@ -0,0 +1,45 @@
+import math
+import numpy as np
+import pygame
+
+def interpolate_color(color1, color2, blend_ratio):
+    return (
+        int(color1[0] * (1 - blend_ratio) + color2[0] * blend_ratio),
+        int(color1[1] * (1 - blend_ratio) + color2[1] * blend_ratio),
+        int(color1[2] * (1 - blend_ratio) + color2[2] * blend_ratio),
+    )
+
+def gradient_surface(size, color_top, color_bottom):
+    width, height = size
+    rows = np.array([interpolate_color(color_top, color_bottom, y / height) for y in range(height)], dtype=np.uint8)
+    return pygame.surfarray.make_surface(np.ascontiguousarray(np.broadcast_to(rows, (width, height, 3))))
+
+class GradientBackground:
+    # the animated gradient is a straight blend between its two end states, so both are baked
+    # once per resolution and each frame is a single blit of their cached mix
+    def __init__(self, color_top_start, color_top_end, color_bottom_start, color_bottom_end, change_speed):
+        self.color_top_start = color_top_start
+        self.color_top_end = color_top_end
+        self.color_bottom_start = color_bottom_start
+        self.color_bottom_end = color_bottom_end
+        self.change_speed = change_speed
+        self.size = None
+
+    def rebuild(self, size):
+        self.size = size
+        self.start = gradient_surface(size, self.color_top_start, self.color_bottom_start)
+        self.end = gradient_surface(size, self.color_top_end, self.color_bottom_end)
+        self.mixed = pygame.Surface(size)
+        self.mixed_alpha = None
+
+    def draw(self, surface, time_offset):
+        if surface.get_size() != self.size:
+            self.rebuild(surface.get_size())
+        blend_ratio = (math.sin(time_offset / self.change_speed) + 1) / 2
+        alpha = int(round(blend_ratio * 255))
+        if alpha != self.mixed_alpha:
+            self.mixed.blit(self.start, (0, 0))
+            self.end.set_alpha(alpha)
+            self.mixed.blit(self.end, (0, 0))
+            self.mixed_alpha = alpha
+        surface.blit(self.mixed, (0, 0))
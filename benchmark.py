@@ -0,0 +1,275 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pygame
+
+from background import GradientBackground
+from starfield import Starfield, StarLayer
+from text_cache import text_cache
+from world import (GameWorld, PLAYING_FIELD_WIDTH, PLAYING_FIELD_HEIGHT, PROJECTILE_POOL_SIZE,
+                   NUM_PLANETS, NUM_ASTEROIDS, NUM_ENEMY_SHIPS, MIN_PLANET_DISTANCE, MASSIVE_SOURCE_MASS,
+                   ProjectilePool, QuadTree, direct_gravity)
+
+SCREEN_SIZE = (800, 1000)
+
+# each sweep varies one entity count and keeps the others at the game's defaults
+SWEEPS = {
+    'enemies': [12, 50, 100, 200, 400],
+    'asteroids': [35, 100, 200, 400, 800],
+    'planets': [10, 25, 50, 100],
+    'projectiles': [0, 60, 120, 240, 480],
+}
+QUICK_SWEEPS = {name: counts[:3] for name, counts in SWEEPS.items()}
+
+GRAVITY_COUNTS = [1000, 5000, 20000]
+GRAVITY_THETAS = [0.3, 0.5, 0.8]
+GRAVITY_SAMPLE = 1000 # targets checked against the exact direct sum
+
+STARTUP_RUNS = 5
+# each runs in a fresh interpreter; the first frame is timed from process start to exit after one frame
+STARTUP_COMMANDS = {
+    'interpreter': ['-c', 'pass'],
+    'import_world': ['-c', 'import world'],
+    'import_main': ['-c', 'import main'],
+    'first_frame': ['main.py', '--quit-after', '1'],
+}
+
+class PhaseTimer:
+    def __init__(self):
+        self.samples = {}
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples.setdefault(name, []).append(time.perf_counter() - start)
+
+def build_scenario(sweep, count, seed):
+    counts = {'planets': NUM_PLANETS, 'asteroids': NUM_ASTEROIDS, 'enemies': NUM_ENEMY_SHIPS, 'projectiles': 0}
+    counts[sweep] = count
+    world = GameWorld(seed,
+                      num_planets=counts['planets'], # start and goal planets come on top
+                      num_asteroids=counts['asteroids'],
+                      num_enemy_ships=counts['enemies'],
+                      max_enemy_ships=counts['enemies'],
+                      min_planet_distance=100 if sweep == 'planets' else MIN_PLANET_DISTANCE)
+    rng = random.Random(seed)
+    world.ship.projectiles = ProjectilePool(max(PROJECTILE_POOL_SIZE, counts['projectiles']))
+    for _ in range(counts['projectiles']):
+        world.ship.projectiles.spawn(rng.uniform(0, PLAYING_FIELD_WIDTH), rng.uniform(0, PLAYING_FIELD_HEIGHT),
+                                     rng.uniform(0, 360), world.current_motion_model)
+    return world
+
+def camera_for(world):
+    camera_offset = world.ship.position - pygame.Vector2(SCREEN_SIZE[0] // 2, SCREEN_SIZE[1] // 2)
+    camera_offset.x = max(0, min(camera_offset.x, PLAYING_FIELD_WIDTH - SCREEN_SIZE[0]))
+    camera_offset.y = max(0, min(camera_offset.y, PLAYING_FIELD_HEIGHT - SCREEN_SIZE[1]))
+    return camera_offset
+
+def summarize(samples):
+    ms = np.array(samples) * 1000
+    return {
+        'mean_ms': round(float(ms.mean()), 4),
+        'p50_ms': round(float(np.percentile(ms, 50)), 4),
+        'p95_ms': round(float(np.percentile(ms, 95)), 4),
+        'max_ms': round(float(ms.max()), 4),
+    }
+
+def run_scenario(screen, sweep, count, seed, frames, warmup):
+    world = build_scenario(sweep, count, seed)
+    background = GradientBackground((75, 0, 130), (255, 0, 0), (0, 0, 50), (0, 255, 255), 6)
+    starfield = Starfield([StarLayer(500, 0.25, (-100, -100, 3100, 4000), seed=seed),
+                           StarLayer(5000, 0.1, (0, 0, 1580, 2500), seed=seed)])
+    # keep the ship alive and firing so every phase has work to do
+    inputs = {'shoot', 'refill'}
+    for _ in range(warmup):
+        world.step(inputs)
+
+    timer = PhaseTimer()
+    world.timer = timer
+    text_cache.reset_stats()
+    bodies = []
+    visible = []
+    for frame in range(frames):
+        with timer.phase('frame'):
+            world.step(inputs)
+            with timer.phase('background'):
+                background.draw(screen, frame * 0.01)
+            camera_offset = camera_for(world)
+            with timer.phase('stars'):
+                starfield.draw(screen, camera_offset)
+            with timer.phase('draw'):
+                for body in world.visible_bodies(camera_offset.x, camera_offset.y, *SCREEN_SIZE):
+                    body.draw(screen, camera_offset)
+        bodies.append(len(world.all_bodies))
+        visible.append(world.visible_count)
+
+    return {
+        'sweep': sweep,
+        'count': count,
+        'mean_bodies': round(sum(bodies) / len(bodies), 1),
+        'mean_visible_bodies': round(sum(visible) / len(visible), 1),
+        'projectiles': len(world.ship.projectiles),
+        'phases': {name: summarize(samples) for name, samples in timer.samples.items()},
+        'text_cache': text_cache.stats(),
+    }
+
+def scaling_exponents(results):
+    # log-log slope of mean phase time against entity count: ~1 is linear, ~2 quadratic
+    exponents = {}
+    for sweep in sorted({r['sweep'] for r in results}):
+        rows = [r for r in results if r['sweep'] == sweep and r['count'] > 0]
+        if len(rows) < 2:
+            continue
+        counts = np.log([r['count'] for r in rows])
+        exponents[sweep] = {}
+        for name in rows[0]['phases']:
+            means = [max(r['phases'][name]['mean_ms'], 1e-6) for r in rows]
+            exponents[sweep][name] = round(float(np.polyfit(counts, np.log(means), 1)[0]), 3)
+    return exponents
+
+def gravity_field(count, seed):
+    # roughly a sector's mix scaled up: a few planets, mostly asteroids, some enemy ships
+    rng = np.random.default_rng(seed)
+    pos = rng.uniform((0, 0), (PLAYING_FIELD_WIDTH, PLAYING_FIELD_HEIGHT), (count, 2))
+    kind = rng.choice(3, count, p=[0.02, 0.8, 0.18])
+    mass = np.where(kind == 0, rng.uniform(50, 150, count) ** 2 * 100,
+                    np.where(kind == 1, rng.uniform(10, 30, count) ** 2 * 1000, 200.0))
+    return pos, mass
+
+def gravity_errors(approx, exact):
+    err = np.linalg.norm(approx - exact, axis=1) / np.maximum(np.linalg.norm(exact, axis=1), 1e-300)
+    return {
+        'mean_rel_error': float(err.mean()),
+        'p99_rel_error': float(np.percentile(err, 99)),
+        'max_rel_error': float(err.max()),
+    }
+
+def gravity_report(counts, thetas, seed):
+    # solver time over every body, relative error on a sample of targets against the exact sum
+    results = []
+    for count in counts:
+        pos, mass = gravity_field(count, seed)
+        sample = np.random.default_rng(seed).choice(count, min(GRAVITY_SAMPLE, count), replace=False)
+        start = time.perf_counter()
+        exact = direct_gravity(pos[sample], pos, mass)
+        direct_ms = (time.perf_counter() - start) * 1000 * count / len(sample)
+        row = {'bodies': count, 'direct_ms_extrapolated': round(direct_ms, 2), 'solvers': []}
+
+        massive = mass >= MASSIVE_SOURCE_MASS
+        for massive_only in (False, True):
+            src_pos, src_mass = (pos[massive], mass[massive]) if massive_only else (pos, mass)
+            for theta in [None] + thetas:
+                start = time.perf_counter()
+                if theta is None:
+                    if not massive_only:
+                        continue
+                    approx = direct_gravity(pos[sample], src_pos, src_mass)
+                    elapsed = (time.perf_counter() - start) * count / len(sample)
+                else:
+                    tree = QuadTree(src_pos, src_mass)
+                    approx = tree.acceleration(pos, theta)[sample]
+                    elapsed = time.perf_counter() - start
+                row['solvers'].append({
+                    'solver': 'direct' if theta is None else 'barnes_hut',
+                    'theta': theta,
+                    'massive_sources_only': massive_only,
+                    'sources': len(src_pos),
+                    'ms': round(elapsed * 1000, 2),
+                    **gravity_errors(approx, exact),
+                })
+        print(f"{count:>7} bodies: direct ~{direct_ms:9.1f} ms, " +
+              ", ".join(f"{'massive ' if r['massive_sources_only'] else ''}{r['solver']}"
+                        f"{'' if r['theta'] is None else ' ' + str(r['theta'])} {r['ms']:.1f} ms"
+                        for r in row['solvers']), file=sys.stderr)
+        results.append(row)
+    return results
+
+def startup_report(runs, seed):
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1")
+    results = {}
+    for name, command in STARTUP_COMMANDS.items():
+        if command[0] == 'main.py':
+            command = command + ['--seed', str(seed)]
+        samples = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run([sys.executable] + command, cwd=here, env=env, check=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            samples.append(time.perf_counter() - start)
+        results[name] = summarize(samples)
+        print(f"{name:>13}: {results[name]['p50_ms']:8.1f} ms", file=sys.stderr)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="time each frame phase over seeded scenarios of growing size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--frames", type=int, default=120)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--sweep", choices=sorted(SWEEPS), action="append",
+                        help="only run the given sweep(s)")
+    parser.add_argument("--quick", action="store_true", help="only the smaller counts of each sweep")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--gravity", action="store_true",
+                        help="compare the direct and Barnes-Hut gravity solvers instead of timing frames")
+    parser.add_argument("--startup", action="store_true",
+                        help="time interpreter start, imports and the game's first frame instead of timing frames")
+    args = parser.parse_args()
+
+    if args.startup:
+        write_report({'seed': args.seed, 'python': platform.python_version(),
+                      'startup': startup_report(2 if args.quick else STARTUP_RUNS, args.seed)}, args.output)
+        return
+
+    if args.gravity:
+        counts = GRAVITY_COUNTS[:2] if args.quick else GRAVITY_COUNTS
+        write_report({'seed': args.seed, 'python': platform.python_version(), 'numpy': np.__version__,
+                      'gravity': gravity_report(counts, GRAVITY_THETAS, args.seed)}, args.output)
+        return
+
+    pygame.init()
+    screen = pygame.display.set_mode(SCREEN_SIZE)
+    sweeps = QUICK_SWEEPS if args.quick else SWEEPS
+
+    results = []
+    for sweep in args.sweep or sorted(sweeps):
+        for count in sweeps[sweep]:
+            results.append(run_scenario(screen, sweep, count, args.seed, args.frames, args.warmup))
+            frame = results[-1]['phases']['frame']['mean_ms']
+            print(f"{sweep:>12} {count:>6}: {frame:8.3f} ms/frame", file=sys.stderr)
+
+    report = {
+        'seed': args.seed,
+        'frames': args.frames,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pygame': pygame.version.ver,
+        'results': results,
+        'scaling_exponents': scaling_exponents(results),
+    }
+    write_report(report, args.output)
+    pygame.quit()
+
+def write_report(report, output):
+    text = json.dumps(report, indent=2)
+    if output:
+        with open(output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    # set here, not at import, so importing this module leaves the video driver alone
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    main()
@@ -0,0 +1,99 @@
+import pygame
+
+from text_cache import get_font
+
+class TextWidget:
+    def __init__(self, size, color):
+        self.size = size
+        self.color = color
+        self.text = None
+        self.surface = None
+        self.rect = pygame.Rect(0, 0, 0, 0)
+
+class Hud:
+    # retained HUD: every line of text is a widget that is only re-rendered when its text
+    # changes, and widgets are composited onto one cached overlay. Call begin(), then
+    # text(...) for each widget that should be showing, then end(); widgets not set since
+    # begin() are taken down. self.dirty collects the screen rects that changed since the
+    # last present(), for screens that are otherwise static.
+    def __init__(self, size):
+        self.widgets = {}
+        self.seen = set()
+        self.dirty = []
+        self.resize(size)
+
+    def resize(self, size):
+        self.overlay = pygame.Surface(size, pygame.SRCALPHA)
+        for widget in self.widgets.values():
+            if widget.surface:
+                self.paint(widget)
+        self.invalidate()
+
+    def invalidate(self):
+        # the screen under the HUD was drawn over: the next present() repaints all of it
+        self.dirty = [self.overlay.get_rect()]
+
+    def paint(self, widget):
+        # widgets never overlap and their area is cleared first, so taking the max keeps
+        # the text's own alpha instead of blending it against the transparent overlay
+        self.overlay.blit(widget.surface, widget.rect, special_flags=pygame.BLEND_RGBA_MAX)
+
+    def begin(self):
+        self.seen = set()
+
+    def text(self, name, text, position, size=24, color=(255, 255, 255), align='left'):
+        self.seen.add(name)
+        widget = self.widgets.get(name)
+        if widget is None:
+            widget = self.widgets[name] = TextWidget(size, color)
+        if text == widget.text and self.placed(widget, position, align) == widget.rect.topleft:
+            return
+        if text != widget.text:
+            widget.text = text
+            widget.surface = get_font(widget.size).render(text, True, widget.color)
+        old = widget.rect
+        widget.rect = widget.surface.get_rect(topleft=(0, 0))
+        widget.rect.topleft = self.placed(widget, position, align)
+        self.clear(old, widget)
+        self.overlay.fill((0, 0, 0, 0), widget.rect)
+        self.paint(widget)
+        self.dirty.append(old.union(widget.rect) if old.width else widget.rect.copy())
+
+    def placed(self, widget, position, align):
+        x, y = int(position[0]), int(position[1])
+        if align == 'right':
+            x -= widget.surface.get_width() if widget.surface else 0
+        elif align == 'center':
+            x -= widget.surface.get_width() // 2 if widget.surface else 0
+        return x, y
+
+    def clear(self, rect, keep=None):
+        # wipe rect off the overlay and restore any other widget it cut into
+        if not rect.width:
+            return
+        self.overlay.fill((0, 0, 0, 0), rect)
+        for other in self.widgets.values():
+            if other is not keep and other.surface and other.rect.colliderect(rect):
+                self.paint(other)
+
+    def end(self):
+        for name in [name for name in self.widgets if name not in self.seen]:
+            widget = self.widgets.pop(name)
+            self.clear(widget.rect)
+            self.dirty.append(widget.rect)
+
+    def draw(self, surface):
+        # the world under the HUD is redrawn every frame, so put every widget back on top
+        for widget in self.widgets.values():
+            surface.blit(self.overlay, widget.rect, widget.rect)
+        self.dirty = []
+
+    def present(self, surface, background=(0, 0, 0)):
+        # static screens: repaint and push only what changed since the last call
+        if not self.dirty:
+            return
+        for rect in self.dirty:
+            surface.fill(background, rect)
+            surface.blit(self.overlay, rect, rect)
+        pygame.display.update(self.dirty)
+        self.dirty = []
@@ -0,0 +1,493 @@
+import os
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import argparse
+import json
+import random
+import socket
+import struct
+import sys
+import threading
+import time
+import zlib
+
+import numpy as np
+import pygame
+
+from world import GameWorld, Planet, Asteroid, EnemyShip, PHYSICS_MODELS, inputs_to_mask, mask_to_inputs
+
+PORT = 5765
+TICK_RATE = 60
+SNAPSHOT_HISTORY = 64 # ticks of snapshots kept as possible delta baselines
+CLIENT_TIMEOUT = 5.0 # seconds without a packet before a client is dropped
+MAX_PACKET = 65507
+
+# everything on the wire is int32: positions in 1/8 px, velocities in 1/256 px per step,
+# angles in 1/100 degree, resources and cash in 1/100
+POSITION_SCALE = 8
+VELOCITY_SCALE = 256
+UNIT_SCALE = 100
+
+INPUT_PACKET = struct.Struct('<BIH') # type, acked snapshot tick, action mask
+# type, tick, baseline tick (NO_BASELINE for a full snapshot), id of the receiving client's own ship
+SNAPSHOT_HEADER = struct.Struct('<BIIH')
+INPUT, SNAPSHOT = 1, 2
+NO_BASELINE = 0xFFFFFFFF
+
+KINDS = ['ship', 'planet', 'asteroid', 'enemy']
+# entity row: kind, x, y, vx, vy, angle, radius, colour, then four kind-specific fields
+# (ship: fuel, oxygen, hull, landed; planet: fuel, oxygen, ore, harvested | shop << 1 | goal << 2;
+# enemy: hull, fuel, pursuing)
+ROW_WIDTH = 12
+GLOBAL_FIELDS = ['epoch', 'frame', 'levels_completed', 'game_over', 'motion_model']
+# one row per player ship, sent whole every snapshot: its entity id and upgrade state
+SHIP_FIELDS = ['id', 'cash', 'thrust_force', 'max_fuel', 'max_hull', 'thrust_force_max', 'shoot_delay',
+               'oxygen_depletion_rate']
+
+def quantize_row(body):
+    p, v = body.position, body.velocity
+    color = getattr(body, 'color', (255, 255, 255))
+    row = [0, round(p.x * POSITION_SCALE), round(p.y * POSITION_SCALE), round(v.x * VELOCITY_SCALE),
+           round(v.y * VELOCITY_SCALE), round(body.angle % 360 * UNIT_SCALE), body.radius,
+           color[0] << 16 | color[1] << 8 | color[2], 0, 0, 0, 0]
+    if isinstance(body, Planet):
+        row[0] = 1
+        flags = body.harvested | body.is_shop << 1 | body.is_goal << 2
+        row[8:] = round(body.fuel * UNIT_SCALE), round(body.oxygen * UNIT_SCALE), round(body.ore * UNIT_SCALE), flags
+    elif isinstance(body, Asteroid):
+        row[0] = 2
+    elif isinstance(body, EnemyShip):
+        row[0] = 3
+        row[8:11] = round(body.hull * UNIT_SCALE), round(body.fuel * UNIT_SCALE), body.pursuing
+    else:
+        row[8:] = round(body.fuel * UNIT_SCALE), round(body.oxygen * UNIT_SCALE), round(body.hull * UNIT_SCALE), body.landed
+    return row
+
+def ship_stats(ship):
+    return [ship.handle[0], round(ship.cash * UNIT_SCALE), ship.thrust_force, ship.max_fuel, ship.max_hull,
+            ship.thrust_force_max, ship.shoot_delay, round(ship.oxygen_depletion_rate * 10000)]
+
+class Snapshot:
+    # one tick of the world as int32 arrays: globals, entity ids (EntityStore handle indices,
+    # stable within an epoch) with their rows, the live shots of every ship and each
+    # ship's upgrade state
+    def __init__(self, tick, globals_, ids, rows, shots, ships):
+        self.tick = tick
+        self.globals = globals_
+        self.ids = ids
+        self.rows = rows
+        self.shots = shots
+        self.ships = ships
+
+    @classmethod
+    def capture(cls, world, tick, epoch):
+        bodies = world.all_bodies
+        ids = np.array([body.handle[0] for body in bodies], dtype=np.int32)
+        rows = np.array([quantize_row(body) for body in bodies], dtype=np.int32).reshape(-1, ROW_WIDTH)
+        order = np.argsort(ids)
+        globals_ = np.array([epoch, world.frame, world.levels_completed, world.game_over,
+                             PHYSICS_MODELS.index(world.current_motion_model)], dtype=np.int32)
+        shots = np.concatenate([ship.projectiles.position[:ship.projectiles.count] for ship in world.ships])
+        shots = np.round(shots * POSITION_SCALE).astype(np.int32).reshape(-1, 2)
+        ships = np.array([ship_stats(ship) for ship in world.ships], dtype=np.int32).reshape(-1, len(SHIP_FIELDS))
+        return cls(tick, globals_, ids[order], rows[order], shots, ships)
+
+    def ship_row(self, ship_id):
+        # the entity row of the ship with this id, or None if it is not in the snapshot
+        i = np.searchsorted(self.ids, ship_id)
+        return self.rows[i] if i < len(self.ids) and self.ids[i] == ship_id else None
+
+    def ship_stat(self, ship_id, field):
+        match = self.ships[self.ships[:, 0] == ship_id]
+        return int(match[0, SHIP_FIELDS.index(field)]) if len(match) else 0
+
+    def encode(self, baseline=None):
+        # against a baseline only rows that changed go out, as differences, plus the ids that
+        # appeared (in full) and disappeared; zlib then squeezes the mostly small numbers
+        if baseline is None:
+            new = np.ones(len(self.ids), dtype=bool)
+            changed = np.zeros(0, dtype=np.int64)
+            deltas = np.zeros((0, ROW_WIDTH), dtype=np.int32)
+            removed = np.zeros(0, dtype=np.int32)
+        else:
+            known = np.isin(self.ids, baseline.ids)
+            new = ~known
+            base_rows = baseline.rows[np.searchsorted(baseline.ids, self.ids[known])]
+            diff = self.rows[known] - base_rows
+            moved = diff.any(axis=1)
+            changed = self.ids[known][moved]
+            deltas = diff[moved]
+            removed = baseline.ids[~np.isin(baseline.ids, self.ids)]
+        counts = np.array([new.sum(), len(changed), len(removed), len(self.shots), len(self.ships)], dtype=np.int32)
+        payload = b''.join([self.globals.tobytes(), counts.tobytes(),
+                            self.ids[new].astype('<u2').tobytes(), self.rows[new].tobytes(),
+                            np.asarray(changed).astype('<u2').tobytes(), deltas.astype(np.int32).tobytes(),
+                            removed.astype('<u2').tobytes(), self.shots.tobytes(), self.ships.tobytes()])
+        return zlib.compress(payload, 6)
+
+    @classmethod
+    def decode(cls, tick, data, baseline=None):
+        buf = zlib.decompress(data)
+        offset = 0
+
+        def take(dtype, count):
+            nonlocal offset
+            array = np.frombuffer(buf, dtype=dtype, count=count, offset=offset)
+            offset += array.nbytes
+            return array
+
+        globals_ = take(np.int32, len(GLOBAL_FIELDS)).copy()
+        new_count, changed_count, removed_count, shot_count, ship_count = take(np.int32, 5).tolist()
+        new_ids = take('<u2', new_count).astype(np.int32)
+        new_rows = take(np.int32, new_count * ROW_WIDTH).reshape(-1, ROW_WIDTH)
+        changed = take('<u2', changed_count).astype(np.int32)
+        deltas = take(np.int32, changed_count * ROW_WIDTH).reshape(-1, ROW_WIDTH)
+        removed = take('<u2', removed_count).astype(np.int32)
+        shots = take(np.int32, shot_count * 2).reshape(-1, 2)
+        ships = take(np.int32, ship_count * len(SHIP_FIELDS)).reshape(-1, len(SHIP_FIELDS))
+
+        if baseline is None:
+            ids, rows = new_ids, new_rows.copy()
+        else:
+            keep = ~np.isin(baseline.ids, removed)
+            ids = np.concatenate([baseline.ids[keep], new_ids])
+            rows = np.concatenate([baseline.rows[keep], new_rows])
+            order = np.argsort(ids)
+            ids, rows = ids[order], rows[order]
+            rows[np.searchsorted(ids, changed)] += deltas
+        return cls(tick, globals_, ids, rows, shots, ships)
+
+    def equals(self, other):
+        return (np.array_equal(self.globals, other.globals) and np.array_equal(self.ids, other.ids) and
+                np.array_equal(self.rows, other.rows) and np.array_equal(self.shots, other.shots) and
+                np.array_equal(self.ships, other.ships))
+
+class RemoteClient:
+    def __init__(self, address, ship):
+        self.address = address
+        self.ship = ship # the ship this client flies
+        self.acked = None
+        self.mask = 0 # held actions from the newest packet
+        self.pressed = 0 # every action seen since the last tick, so one-shot presses are not lost
+        self.last_seen = time.perf_counter()
+        self.bytes_sent = 0
+        self.full = 0
+        self.delta = 0
+
+class SnapshotServer:
+    # authoritative sector: clients send their action masks and the newest snapshot tick they
+    # hold. Each client flies its own ship (the world's first ship goes to whoever joins while
+    # it is free, the rest are added and removed as clients come and go); every tick the server
+    # steps the world on each ship's own inputs and sends each client a snapshot encoded
+    # against its acked one, with the id of its ship in the header
+    def __init__(self, world, port=PORT, snapshot_every=1, host='127.0.0.1'):
+        self.world = world
+        self.snapshot_every = snapshot_every
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind((host, port))
+        self.socket.setblocking(False)
+        self.port = self.socket.getsockname()[1]
+        self.clients = {}
+        self.snapshots = {}
+        self.tick_count = 0
+        self.epoch = 0
+        self.store = world.store
+        self.tick_times = []
+        self.full_bytes = 0 # what the same snapshots would have cost sent in full
+
+    def poll(self):
+        while True:
+            try:
+                data, address = self.socket.recvfrom(MAX_PACKET)
+            except (BlockingIOError, ConnectionResetError):
+                return
+            if len(data) != INPUT_PACKET.size or data[0] != INPUT:
+                continue
+            _, acked, mask = INPUT_PACKET.unpack(data)
+            client = self.clients.get(address)
+            if client is None:
+                client = self.clients[address] = RemoteClient(address, self.claim_ship())
+            if acked != NO_BASELINE and (client.acked is None or acked > client.acked):
+                client.acked = acked
+            client.mask = mask
+            client.pressed |= mask
+            client.last_seen = time.perf_counter()
+
+    def claim_ship(self):
+        if all(client.ship is not self.world.ship for client in self.clients.values()):
+            if self.world.ship.parked:
+                self.world.unpark_ship(self.world.ship)
+            return self.world.ship
+        return self.world.add_ship()
+
+    def release_ship(self, ship):
+        # the world's own ship cannot go, so it is parked for the next client to join;
+        # a parked ship cannot end the run for the players still flying
+        if ship is self.world.ship:
+            self.world.park_ship(ship)
+        else:
+            self.world.remove_ship(ship)
+
+    def tick(self):
+        start = time.perf_counter()
+        self.poll()
+        now = time.perf_counter()
+        inputs = {}
+        for address, client in list(self.clients.items()):
+            if now - client.last_seen > CLIENT_TIMEOUT:
+                del self.clients[address]
+                self.release_ship(client.ship)
+                continue
+            inputs[client.ship] = mask_to_inputs(client.mask | client.pressed)
+            client.pressed = 0
+        self.world.step(inputs)
+        self.tick_count += 1
+        if self.world.store is not self.store:
+            # new sector or restreamed chunks: handles were reassigned, old baselines are void
+            self.store = self.world.store
+            self.epoch += 1
+        if self.tick_count % self.snapshot_every == 0:
+            self.broadcast()
+        self.tick_times.append(time.perf_counter() - start)
+
+    def broadcast(self):
+        snapshot = Snapshot.capture(self.world, self.tick_count, self.epoch)
+        self.snapshots[snapshot.tick] = snapshot
+        self.snapshots.pop(snapshot.tick - SNAPSHOT_HISTORY * self.snapshot_every, None)
+        full = None
+        for client in self.clients.values():
+            baseline = self.snapshots.get(client.acked) if client.acked is not None else None
+            if baseline is not None and baseline.globals[0] != self.epoch:
+                baseline = None
+            data = snapshot.encode(baseline)
+            if full is None:
+                full = data if baseline is None else snapshot.encode()
+            self.full_bytes += len(full)
+            packet = SNAPSHOT_HEADER.pack(SNAPSHOT, snapshot.tick, baseline.tick if baseline else NO_BASELINE,
+                                          client.ship.handle[0]) + data
+            if len(packet) > MAX_PACKET:
+                print(f"snapshot {snapshot.tick} is {len(packet)} bytes, too big for one datagram", file=sys.stderr)
+                continue
+            self.socket.sendto(packet, client.address)
+            client.bytes_sent += len(packet)
+            if baseline is None:
+                client.full += 1
+            else:
+                client.delta += 1
+
+    def run(self, seconds=None, rate=TICK_RATE, stop=None):
+        step = 1 / rate
+        next_tick = time.perf_counter()
+        end = None if seconds is None else next_tick + seconds
+        while (end is None or next_tick < end) and not (stop and stop.is_set()):
+            self.tick()
+            next_tick += step
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.perf_counter() # fell behind: do not try to catch up
+
+    def report(self, seconds):
+        ms = np.array(self.tick_times or [0.0]) * 1000
+        sent = sum(client.bytes_sent for client in self.clients.values())
+        return {
+            'ticks': self.tick_count,
+            'tick_mean_ms': round(float(ms.mean()), 3),
+            'tick_p99_ms': round(float(np.percentile(ms, 99)), 3),
+            'bytes_sent': sent,
+            'bytes_if_full': self.full_bytes,
+            'clients': [{
+                'address': f"{c.address[0]}:{c.address[1]}",
+                'ship': c.ship.handle[0],
+                'kbytes_per_second': round(c.bytes_sent / 1000 / seconds, 2),
+                'full_snapshots': c.full,
+                'delta_snapshots': c.delta,
+                'mean_snapshot_bytes': round(c.bytes_sent / max(c.full + c.delta, 1), 1),
+            } for c in self.clients.values()],
+        }
+
+class SnapshotClient:
+    def __init__(self, host='127.0.0.1', port=PORT):
+        self.address = (host, port)
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setblocking(False)
+        self.snapshots = {}
+        self.latest = None
+        self.ship_id = None # id of this client's ship in the latest snapshot
+        self.bytes_received = 0
+        self.dropped = 0 # snapshots whose baseline was no longer held
+
+    def send(self, inputs):
+        acked = self.latest.tick if self.latest else NO_BASELINE
+        self.socket.sendto(INPUT_PACKET.pack(INPUT, acked, inputs_to_mask(inputs)), self.address)
+
+    def poll(self):
+        while True:
+            try:
+                packet = self.socket.recv(MAX_PACKET)
+            except (BlockingIOError, ConnectionResetError):
+                return self.latest
+            self.bytes_received += len(packet)
+            kind, tick, base, ship_id = SNAPSHOT_HEADER.unpack_from(packet)
+            if kind != SNAPSHOT or (self.latest and tick <= self.latest.tick):
+                continue
+            baseline = None
+            if base != NO_BASELINE:
+                baseline = self.snapshots.get(base)
+                if baseline is None:
+                    self.dropped += 1
+                    continue
+            snapshot = Snapshot.decode(tick, packet[SNAPSHOT_HEADER.size:], baseline)
+            self.snapshots[tick] = snapshot
+            for old in [t for t in self.snapshots if t < tick - SNAPSHOT_HISTORY * 2]:
+                del self.snapshots[old]
+            self.latest = snapshot
+            self.ship_id = ship_id
+
+def unpack_color(value):
+    return (value >> 16 & 255, value >> 8 & 255, value & 255)
+
+def draw_snapshot(surface, snapshot, font, ship_id):
+    # centred on this client's own ship, drawn white; the other players' ships are blue
+    width, height = surface.get_size()
+    rows = snapshot.rows
+    ship = snapshot.ship_row(ship_id)
+    center = ship[1:3] / POSITION_SCALE if ship is not None else np.zeros(2)
+    offset = center - (width // 2, height // 2)
+    surface.fill((0, 0, 30))
+    for entity, (kind, x, y, _, _, angle, radius, color, a, b, c, d) in zip(snapshot.ids.tolist(), rows.tolist()):
+        sx, sy = x / POSITION_SCALE - offset[0], y / POSITION_SCALE - offset[1]
+        if not (-radius - 10 <= sx <= width + radius + 10 and -radius - 10 <= sy <= height + radius + 10):
+            continue
+        if KINDS[kind] == 'ship':
+            points = [pygame.Vector2(0, -10), pygame.Vector2(5, 10), pygame.Vector2(-5, 10)]
+            hull_color = (255, 255, 255) if entity == ship_id else (120, 180, 255)
+            pygame.draw.polygon(surface, hull_color, [p.rotate(angle / UNIT_SCALE) + (sx, sy) for p in points])
+        elif KINDS[kind] == 'planet' and d & 4:
+            pygame.draw.circle(surface, (0, 255, 255), (int(sx), int(sy)), radius, 2)
+        else:
+            pygame.draw.circle(surface, unpack_color(color), (int(sx), int(sy)), radius)
+    for x, y in (snapshot.shots / POSITION_SCALE - offset).tolist():
+        pygame.draw.circle(surface, (255, 255, 0), (int(x), int(y)), 3)
+    if ship is not None:
+        fuel, oxygen, hull = ship[8:11] / UNIT_SCALE
+        cash = snapshot.ship_stat(ship_id, 'cash') / UNIT_SCALE
+        lines = [f"Fuel: {fuel:.2f}%", f"Oxygen: {oxygen:.2f}%", f"Hull: {hull:.2f}%", f"Cash: {cash:.2f}"]
+        for i, line in enumerate(lines):
+            surface.blit(font.render(line, True, (255, 255, 255)), (10, 10 + 20 * i))
+    if snapshot.globals[GLOBAL_FIELDS.index('game_over')]:
+        surface.blit(font.render("Game Over - press R", True, (255, 0, 0)), (width // 2 - 80, height // 2))
+
+def run_client(host, port):
+    from main import HELD_KEYS, SELECT_KEYS
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((800, 1000))
+    pygame.display.set_caption(f"netplay client - {host}:{port}")
+    font = pygame.font.SysFont(None, 24)
+    clock = pygame.time.Clock()
+    client = SnapshotClient(host, port)
+    start = time.perf_counter()
+    running = True
+    while running:
+        pending = set()
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN:
+                if event.key in SELECT_KEYS:
+                    pending.add(SELECT_KEYS[event.key])
+                if event.key == pygame.K_r:
+                    pending.add('restart')
+        keys = pygame.key.get_pressed()
+        client.send({action for key, action in HELD_KEYS.items() if keys[key]} | pending)
+        snapshot = client.poll()
+        if snapshot is not None:
+            draw_snapshot(screen, snapshot, font, client.ship_id)
+            rate = client.bytes_received / 1000 / max(time.perf_counter() - start, 1e-9)
+            screen.blit(font.render(f"{rate:.1f} kB/s", True, (0, 255, 0)), (10, 100))
+        pygame.display.flip()
+        clock.tick(TICK_RATE)
+    pygame.quit()
+
+def loopback(clients, seconds, seed, snapshot_every, loss=0.0, sleeping=False):
+    # a server and headless bot clients on 127.0.0.1 in one process, each bot flying its own
+    # ship; every snapshot a client rebuilds is checked against the server's copy of that
+    # tick, and must hold the ship the server says is the client's
+    world = GameWorld(seed, sleeping=sleeping)
+    server = SnapshotServer(world, port=0, snapshot_every=snapshot_every)
+    stop = threading.Event()
+    results = []
+
+    def bot(index):
+        rng = random.Random(f"{seed}-bot-{index}")
+        client = SnapshotClient(port=server.port)
+        checked = mismatched = missing = 0
+        held = set()
+        while not stop.is_set():
+            if rng.random() < 0.05:
+                held = {a for a in ('left', 'right', 'thrust', 'shoot') if rng.random() < 0.4}
+            if rng.random() >= loss: # simulated loss of the client's acks and inputs
+                client.send(held | {'restart', 'refill'})
+            before = client.latest
+            snapshot = client.poll()
+            if snapshot is not None and snapshot is not before:
+                truth = server.snapshots.get(snapshot.tick)
+                if truth is not None:
+                    checked += 1
+                    mismatched += not truth.equals(snapshot)
+                missing += snapshot.ship_row(client.ship_id) is None
+            time.sleep(1 / TICK_RATE)
+        results.append({'client': index, 'ship': client.ship_id, 'kbytes_received': round(client.bytes_received / 1000, 1),
+                        'snapshots_checked': checked, 'mismatches': mismatched, 'own_ship_missing': missing,
+                        'dropped': client.dropped})
+
+    threads = [threading.Thread(target=bot, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    server.run(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    report = server.report(seconds)
+    report['received'] = sorted(results, key=lambda r: r['client'])
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="authoritative sector server and thin clients over UDP")
+    sub = parser.add_subparsers(dest="mode", required=True)
+    serve = sub.add_parser("server", help="run the sector and serve snapshots")
+    serve.add_argument("--port", type=int, default=PORT)
+    serve.add_argument("--seed", type=int, default=0)
+    serve.add_argument("--snapshot-every", type=int, default=1, help="send a snapshot every N ticks")
+    serve.add_argument("--seconds", type=float, help="stop after this long and print the report")
+    serve.add_argument("--sleep", action="store_true", help="let distant asteroids and enemies sleep")
+    join = sub.add_parser("client", help="play on a server")
+    join.add_argument("--host", default="127.0.0.1")
+    join.add_argument("--port", type=int, default=PORT)
+    loop = sub.add_parser("loopback", help="server plus bot clients on this machine, then a bandwidth and tick report")
+    loop.add_argument("--clients", type=int, default=2)
+    loop.add_argument("--seconds", type=float, default=10)
+    loop.add_argument("--seed", type=int, default=0)
+    loop.add_argument("--snapshot-every", type=int, default=1)
+    loop.add_argument("--loss", type=float, default=0.0, help="fraction of client packets to drop")
+    loop.add_argument("--sleep", action="store_true", help="let distant asteroids and enemies sleep")
+    args = parser.parse_args()
+
+    if args.mode == "client":
+        run_client(args.host, args.port)
+    elif args.mode == "server":
+        server = SnapshotServer(GameWorld(args.seed, sleeping=args.sleep), args.port, args.snapshot_every)
+        print(f"serving on 127.0.0.1:{server.port}", file=sys.stderr)
+        start = time.perf_counter()
+        try:
+            server.run(args.seconds)
+        except KeyboardInterrupt:
+            pass
+        print(json.dumps(server.report(time.perf_counter() - start), indent=2))
+    else:
+        print(json.dumps(loopback(args.clients, args.seconds, args.seed, args.snapshot_every, args.loss, args.sleep), indent=2))
+
+if __name__ == "__main__":
+    main()
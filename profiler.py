@@ -0,0 +1,134 @@
+import cProfile
+import csv
+import io
+import json
+import pstats
+import sys
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+import pygame
+
+from text_cache import text_cache
+
+PROFILE_WINDOW = 120 # frames in the rolling mean/p99
+OVERLAY_REFRESH_FRAMES = 15 # re-render the overlay text this often so it stays readable and cached
+
+class FrameProfiler:
+    # per-phase wall time for each frame; also usable as GameWorld.timer so the
+    # physics/projectiles/collision phases inside world.step show up on their own
+    def __init__(self, window=PROFILE_WINDOW, keep_history=False):
+        self.window = window
+        self.keep_history = keep_history # every frame's row, for export
+        self.recent = {}
+        self.history = []
+        self.times = {}
+        self.counts = {}
+        self.frame = 0
+        self.frame_start = None
+        self.lap_start = None
+        self.show_overlay = False
+        self.overlay_lines = []
+        self.overlay_panel = None
+        self.capture_start = None
+        self.capture_end = None
+        self.capture_path = None
+        self.profile = None
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.times[name] = self.times.get(name, 0.0) + time.perf_counter() - start
+
+    def lap(self, name):
+        # charge the time since the previous lap (or the frame start) to name
+        now = time.perf_counter()
+        self.times[name] = self.times.get(name, 0.0) + now - self.lap_start
+        self.lap_start = now
+
+    def begin_frame(self):
+        self.times = {}
+        if self.capture_start is not None and self.capture_start <= self.frame < self.capture_end:
+            # only the frames themselves, not the clock.tick sleeps between them
+            if self.profile is None:
+                self.profile = cProfile.Profile()
+            self.profile.enable()
+        self.frame_start = self.lap_start = time.perf_counter()
+
+    def end_frame(self, **counts):
+        self.times['frame'] = time.perf_counter() - self.frame_start
+        for name, seconds in self.times.items():
+            samples = self.recent.get(name)
+            if samples is None:
+                samples = self.recent[name] = deque(maxlen=self.window)
+            samples.append(seconds)
+        self.counts = counts
+        if self.keep_history:
+            row = {'frame': self.frame}
+            row.update((f'{name}_ms', round(seconds * 1000, 4)) for name, seconds in self.times.items())
+            row.update(counts)
+            self.history.append(row)
+        self.frame += 1
+        if self.profile:
+            self.profile.disable()
+            if self.frame == self.capture_end:
+                self.finish_capture()
+
+    def capture(self, start, frames, path=None):
+        # cProfile frames [start, start + frames); stats go to path (pstats format) and a summary to stderr
+        self.capture_start = start
+        self.capture_end = start + frames
+        self.capture_path = path
+
+    def finish_capture(self):
+        if self.capture_path:
+            self.profile.dump_stats(self.capture_path)
+        out = io.StringIO()
+        pstats.Stats(self.profile, stream=out).sort_stats('cumulative').print_stats(25)
+        print(f"cProfile of frames {self.capture_start}-{self.capture_end - 1}:", file=sys.stderr)
+        print(out.getvalue(), file=sys.stderr)
+        self.profile = None
+
+    def stats(self):
+        result = {}
+        for name, samples in self.recent.items():
+            ms = np.array(samples) * 1000
+            result[name] = {'mean_ms': float(ms.mean()), 'p99_ms': float(np.percentile(ms, 99))}
+        return result
+
+    def export(self, path):
+        if path.endswith('.csv'):
+            columns = []
+            for row in self.history:
+                columns.extend(key for key in row if key not in columns)
+            with open(path, "w", newline="") as f:
+                writer = csv.DictWriter(f, columns, restval='')
+                writer.writeheader()
+                writer.writerows(self.history)
+        else:
+            with open(path, "w") as f:
+                json.dump({'summary': self.stats(), 'frames': self.history}, f, indent=2)
+                f.write("\n")
+
+    def draw_overlay(self, surface, position=(10, 130)):
+        if not self.show_overlay:
+            return
+        if self.frame % OVERLAY_REFRESH_FRAMES == 1 or not self.overlay_lines:
+            self.overlay_lines = [f"{'phase':<12}{'mean':>8}{'p99':>8}"]
+            for name, s in self.stats().items():
+                self.overlay_lines.append(f"{name:<12}{s['mean_ms']:>8.2f}{s['p99_ms']:>8.2f}")
+            self.overlay_lines.append(", ".join(f"{name} {count}" for name, count in self.counts.items()))
+        x, y = position
+        size = (340, 18 * len(self.overlay_lines) + 8)
+        if self.overlay_panel is None or self.overlay_panel.get_size() != size:
+            self.overlay_panel = pygame.Surface(size, pygame.SRCALPHA)
+            self.overlay_panel.fill((0, 0, 0, 170))
+        surface.blit(self.overlay_panel, (x - 4, y - 4))
+        for line in self.overlay_lines:
+            surface.blit(text_cache.render(18, line, (0, 255, 0), 'monospace'), (x, y))
+            y += 18
@@ -0,0 +1,112 @@
+import argparse
+import hashlib
+import heapq
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from world import GameWorld, ACTIONS, inputs_to_mask, mask_to_inputs
+
+RECORDING_VERSION = 1
+# runs of identical input masks, so a held key costs 6 bytes no matter how long it is held
+RUN_DTYPE = np.dtype([('mask', '<u2'), ('length', '<u4')])
+
+def world_checksum(world):
+    ship = world.ship
+    pool = ship.projectiles
+    digest = hashlib.sha256()
+    digest.update(np.array([world.frame, world.levels_completed, world.restarts, world.game_over,
+                            world.sector_base_seed % (1 << 63)], dtype=np.int64).tobytes())
+    digest.update(type(world.current_motion_model).__name__.encode())
+    digest.update(np.array([ship.angle, ship.fuel, ship.oxygen, ship.hull, ship.cash, ship.thrust_force,
+                            ship.shoot_cooldown, ship.max_speed], dtype=np.float64).tobytes())
+    digest.update(np.array([(b.position.x, b.position.y, b.velocity.x, b.velocity.y, b.angle)
+                            for b in world.all_bodies], dtype=np.float64).tobytes())
+    digest.update(np.array([p.harvested for p in world.planets], dtype=bool).tobytes())
+    digest.update(pool.position[:pool.count].tobytes())
+    digest.update(pool.velocity[:pool.count].tobytes())
+    digest.update(pool.lifetime[:pool.count].tobytes())
+    return digest.hexdigest()[:16]
+
+class InputRecorder:
+    def __init__(self, seed, **world_kwargs):
+        self.seed = seed
+        self.world_kwargs = world_kwargs
+        self.runs = [] # [mask, length]
+        self.frames = 0
+
+    def record(self, inputs):
+        mask = inputs_to_mask(inputs)
+        if self.runs and self.runs[-1][0] == mask:
+            self.runs[-1][1] += 1
+        else:
+            self.runs.append([mask, 1])
+        self.frames += 1
+
+    def save(self, path, world=None):
+        header = {
+            'version': RECORDING_VERSION,
+            'seed': self.seed,
+            'world': self.world_kwargs,
+            'actions': ACTIONS,
+            'frames': self.frames,
+            'checksum': world_checksum(world) if world else None,
+        }
+        runs = np.array([tuple(run) for run in self.runs], dtype=RUN_DTYPE)
+        with open(path, "wb") as f:
+            f.write(json.dumps(header).encode() + b"\n")
+            f.write(runs.tobytes())
+
+def load_recording(path):
+    with open(path, "rb") as f:
+        header = json.loads(f.readline())
+        runs = np.frombuffer(f.read(), dtype=RUN_DTYPE)
+    if header['version'] != RECORDING_VERSION:
+        raise ValueError(f"{path}: recording version {header['version']}, expected {RECORDING_VERSION}")
+    if header['actions'] != ACTIONS[:len(header['actions'])]:
+        raise ValueError(f"{path}: recorded with a different action layout")
+    return header, runs
+
+def replay(header, runs, slowest=0):
+    world = GameWorld(header['seed'], **header['world'])
+    frame_times = []
+    frame = 0
+    for mask, length in runs:
+        inputs = mask_to_inputs(int(mask))
+        for _ in range(int(length)):
+            start = time.perf_counter()
+            world.step(inputs)
+            frame += 1
+            if slowest:
+                frame_times.append((time.perf_counter() - start, frame))
+    return world, heapq.nlargest(slowest, frame_times)
+
+def main():
+    parser = argparse.ArgumentParser(description="re-simulate a recorded session headless as fast as possible")
+    parser.add_argument("recording", help="file written by python main.py --record FILE")
+    parser.add_argument("--slowest", type=int, default=5, help="report the N slowest frames")
+    args = parser.parse_args()
+
+    header, runs = load_recording(args.recording)
+    start = time.perf_counter()
+    world, slowest = replay(header, runs, args.slowest)
+    elapsed = time.perf_counter() - start
+    checksum = world_checksum(world)
+
+    frames = header['frames']
+    print(f"{frames} frames in {elapsed:.2f}s ({frames / max(elapsed, 1e-9):.0f} frames/s), "
+          f"seed {header['seed']}, level {world.levels_completed}")
+    for seconds, frame in slowest:
+        print(f"  frame {frame}: {seconds * 1000:.2f} ms")
+    print(f"checksum {checksum}")
+    if header['checksum'] and header['checksum'] != checksum:
+        print(f"MISMATCH: recorded {header['checksum']}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    # set here, not at import: main.py imports InputRecorder before opening its window
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    main()
@@ -0,0 +1,219 @@
+import random
+from collections import deque
+
+import numpy as np
+import pygame
+
+from world import EntityStore, PHYSICS_MODELS
+
+REWIND_SECONDS = 10
+REWIND_KEYFRAME_INTERVAL = 30 # frames; restoring replays at most this many deltas
+
+BODY_FIELDS = ['x', 'y', 'vx', 'vy', 'ax', 'ay', 'nx', 'ny', 'ix', 'iy', 'angle', 'thrusting', 'alive', 'model',
+               'asleep', 'far_frames', 'fuel', 'oxygen', 'hull', 'ore', 'harvested']
+SHIP_FIELDS = ['landed', 'current_planet', 'cash', 'thrust_force', 'shoot_cooldown', 'shoot_delay', 'max_fuel',
+               'max_hull', 'thrust_force_max', 'oxygen_depletion_rate', 'max_speed']
+
+def body_row(body):
+    p, v, a, n, i = body.position, body.velocity, body.acceleration, body.net_acceleration, body.impetus
+    return (p.x, p.y, v.x, v.y, a.x, a.y, n.x, n.y, i.x, i.y, body.angle, body.thrusting, body.alive,
+            PHYSICS_MODELS.index(body.motion_model), body.asleep, body.far_frames, getattr(body, 'fuel', 0), getattr(body, 'oxygen', 0),
+            getattr(body, 'hull', 0), getattr(body, 'ore', 0), getattr(body, 'harvested', False))
+
+def pack_rng(state):
+    # random.Random's state as its 625 Mersenne Twister words in a uint32 array (2.5 kB)
+    # instead of a tuple of int objects, plus the cached gauss value
+    _, words, gauss_next = state
+    return np.array(words, dtype=np.uint32), gauss_next
+
+def unpack_rng(packed):
+    words, gauss_next = packed
+    return random.Random.VERSION, tuple(words.tolist()), gauss_next
+
+def rng_nbytes(packed):
+    return packed[0].nbytes + 8
+
+class Segment:
+    # one keyframe and the deltas of the frames after it, each a (flat indices, values)
+    # pair of the entries that changed since the frame before
+    def __init__(self, frame, state):
+        self.frame = frame
+        self.keyframe = state
+        self.deltas = []
+        self.shots = []
+        self.rng = []
+        self.nbytes = state.nbytes
+
+    def __len__(self):
+        return 1 + len(self.deltas)
+
+class RewindBuffer:
+    # ring of compact per-frame snapshots of the current sector. Bodies, ship and world
+    # scalars are one flat float64 vector per frame: a keyframe every keyframe_interval
+    # frames and, in between, only the entries that changed. Projectiles are stored as
+    # their live slots and the world's random state only when it moved. The oldest
+    # segment is dropped once the window is longer than seconds or bigger than max_bytes.
+    def __init__(self, seconds=REWIND_SECONDS, keyframe_interval=REWIND_KEYFRAME_INTERVAL, max_bytes=None, rate=60):
+        self.capacity = int(seconds * rate)
+        self.keyframe_interval = keyframe_interval
+        self.max_bytes = max_bytes
+        self.clear()
+
+    def clear(self):
+        self.segments = deque()
+        self.store = None
+        self.universe = []
+        self.last = None
+        self.last_rng = None
+        self.frames = 0
+        self.nbytes = 0
+
+    def capture(self, world):
+        ship = self.ship
+        rows = np.array([body_row(body) for body in self.universe], dtype=float).ravel()
+        current = self.universe.index(ship.current_planet) if ship.current_planet in self.universe else -1
+        scalars = [getattr(ship, name) for name in SHIP_FIELDS[2:]]
+        out_since = -1 if ship.oxygen_out_since is None else ship.oxygen_out_since
+        tail = [ship.landed, current] + scalars + [world.frame, world.game_over, out_since,
+                                                   PHYSICS_MODELS.index(world.current_motion_model)]
+        return np.concatenate([rows, np.array(tail, dtype=float)])
+
+    def record(self, world):
+        if world.store is not self.store:
+            # new sector (or restart): the old window no longer applies
+            self.clear()
+            self.store = world.store
+            self.universe = list(world.all_bodies)
+            self.ship = world.ship
+            self.asteroids = list(world.asteroids)
+            self.enemy_ships = list(world.enemy_ships)
+        state = self.capture(world)
+        pool = world.ship.projectiles
+        n = pool.count
+        shots = (pool.position[:n].copy(), pool.previous_position[:n].copy(), pool.velocity[:n].copy(),
+                 pool.lifetime[:n].copy(), np.array([PHYSICS_MODELS.index(m) for m in pool.models[:n]], dtype=np.int8))
+        rng = pack_rng(world.random.getstate())
+        if self.last_rng is not None and rng[1] == self.last_rng[1] and np.array_equal(rng[0], self.last_rng[0]):
+            rng = None
+        else:
+            self.last_rng = rng
+
+        segment = self.segments[-1] if self.segments else None
+        if segment is None or len(segment) >= self.keyframe_interval or state.shape != self.last.shape:
+            segment = Segment(world.frame, state)
+            if rng is None:
+                rng = self.last_rng # every segment starts from a known random state
+            self.segments.append(segment)
+        else:
+            changed = np.flatnonzero(state != self.last).astype(np.int32)
+            segment.deltas.append((changed, state[changed]))
+            segment.nbytes += changed.nbytes * 3
+        segment.shots.append(shots)
+        segment.rng.append(rng)
+        segment.nbytes += sum(a.nbytes for a in shots)
+        if rng is not None:
+            segment.nbytes += rng_nbytes(rng)
+        self.last = state
+        self.frames += 1
+        self.nbytes = sum(s.nbytes for s in self.segments)
+        self.evict()
+
+    def evict(self):
+        while len(self.segments) > 1 and (self.frames - len(self.segments[0]) >= self.capacity or
+                                          (self.max_bytes and self.nbytes > self.max_bytes)):
+            dropped = self.segments.popleft()
+            self.frames -= len(dropped)
+            self.nbytes -= dropped.nbytes
+
+    def oldest(self):
+        return self.segments[0].frame if self.segments else None
+
+    def newest(self):
+        return self.segments[-1].frame + len(self.segments[-1]) - 1 if self.segments else None
+
+    def rewind(self, world, frames=1):
+        # step back, forgetting the frames that are undone; False once the window is used up
+        if not self.segments or world.store is not self.store:
+            return False
+        target = max(self.oldest(), self.newest() - frames)
+        if target == self.newest():
+            return False
+        self.restore(world, target)
+        self.truncate(target)
+        return True
+
+    def state_at(self, frame):
+        for segment in self.segments:
+            if segment.frame <= frame < segment.frame + len(segment):
+                offset = frame - segment.frame
+                state = segment.keyframe.copy()
+                for changed, values in segment.deltas[:offset]:
+                    state[changed] = values
+                rng = next(r for r in reversed(segment.rng[:offset + 1]) if r is not None)
+                return state, segment.shots[offset], rng
+        raise KeyError(frame)
+
+    def truncate(self, frame):
+        while self.segments and self.segments[-1].frame > frame:
+            dropped = self.segments.pop()
+            self.frames -= len(dropped)
+        segment = self.segments[-1]
+        keep = frame - segment.frame
+        self.frames -= len(segment) - 1 - keep
+        del segment.deltas[keep:]
+        del segment.shots[keep + 1:]
+        del segment.rng[keep + 1:]
+        self.last, _, self.last_rng = self.state_at(frame)
+        self.nbytes = sum(s.nbytes for s in self.segments)
+
+    def restore(self, world, frame):
+        state, shots, rng = self.state_at(frame)
+        width = len(BODY_FIELDS)
+        rows = state[:width * len(self.universe)].reshape(-1, width)
+        tail = state[width * len(self.universe):]
+        for body, row in zip(self.universe, rows.tolist()):
+            x, y, vx, vy, ax, ay, nx, ny, ix, iy, angle, thrusting, alive, model, asleep, far_frames = row[:16]
+            body.position = pygame.Vector2(x, y)
+            body.previous_position = pygame.Vector2(x, y)
+            body.velocity = pygame.Vector2(vx, vy)
+            body.acceleration = pygame.Vector2(ax, ay)
+            body.net_acceleration = pygame.Vector2(nx, ny)
+            body.impetus = pygame.Vector2(ix, iy)
+            body.angle = angle
+            body.thrusting = bool(thrusting)
+            body.alive = bool(alive)
+            body.motion_model = PHYSICS_MODELS[int(model)]
+            body.asleep = bool(asleep)
+            body.far_frames = int(far_frames)
+            for name, value in zip(BODY_FIELDS[16:], row[16:]):
+                if hasattr(body, name):
+                    setattr(body, name, bool(value) if name == 'harvested' else value)
+
+        ship = self.ship
+        ship.landed = bool(tail[0])
+        ship.current_planet = self.universe[int(tail[1])] if tail[1] >= 0 else None
+        for name, value in zip(SHIP_FIELDS[2:], tail[2:len(SHIP_FIELDS)].tolist()):
+            setattr(ship, name, int(value) if name in ('shoot_cooldown', 'shoot_delay') else value)
+        frame, game_over, out_since, model = tail[len(SHIP_FIELDS):].tolist()
+        world.frame = int(frame)
+        world.game_over = bool(game_over)
+        ship.oxygen_out_since = None if out_since < 0 else int(out_since)
+        world.current_motion_model = PHYSICS_MODELS[int(model)]
+        world.random.setstate(unpack_rng(rng))
+
+        pool = ship.projectiles
+        position, previous, velocity, lifetime, models = shots
+        n = len(lifetime)
+        pool.position[:n], pool.previous_position[:n], pool.velocity[:n], pool.lifetime[:n] = \
+            position, previous, velocity, lifetime
+        pool.models[:n] = [PHYSICS_MODELS[m] for m in models]
+        pool.models[n:pool.count] = None
+        pool.count = n
+
+        world.store = self.store = EntityStore(body for body in self.universe if body.alive)
+        world.all_bodies = world.store.bodies
+        world.asteroids[:] = [a for a in self.asteroids if a.alive]
+        world.enemy_ships[:] = [e for e in self.enemy_ships if e.alive]
+        world.grid = None
+        world.asleep_count = sum(body.asleep for body in world.all_bodies)
+        world.index_planets()
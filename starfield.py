@@ -0,0 +1,75 @@
+import math
+import random
+import numpy as np
+import pygame
+
+STAR_TILE_SIZE = 512
+
+def fit_tile(extent, size):
+    # the whole-pixel tile size closest to size that splits extent into equal tiles
+    for n in sorted(range(1, int(extent) + 1), key=lambda n: abs(extent / n - size)):
+        if extent % n == 0 and size / 2 <= extent / n <= size * 2:
+            return int(extent // n)
+    raise ValueError(f"no tile size near {size} divides {extent} evenly")
+
+class StarLayer:
+    # stars are baked into tile surfaces the first time a tile scrolls into view,
+    # so a frame costs a handful of blits no matter how many stars the layer holds
+    def __init__(self, num_stars, parallax, bounds, color=(255, 255, 255), radius=1, seed=None, tile_size=STAR_TILE_SIZE,
+                 wrap=False):
+        rng = random.Random(seed)
+        left, top, right, bottom = bounds
+        self.positions = np.array([(rng.uniform(left, right), rng.uniform(top, bottom))
+                                   for _ in range(num_stars)], dtype=float).reshape(-1, 2)
+        self.parallax = parallax
+        self.color = color
+        self.radius = radius
+        self.tiles = {}
+        # with wrap the layer repeats every bounds-sized block (bounds starting at 0, 0), so
+        # an endless sector scrolls through a fixed set of tiles. The tiles have to divide the
+        # bounds exactly, or each repeat would end in a starless strip and a seam.
+        if wrap:
+            self.tile_size = (fit_tile(right, tile_size), fit_tile(bottom, tile_size))
+            self.period = (round(right / self.tile_size[0]), round(bottom / self.tile_size[1]))
+            # stars near one edge also have to show up across the opposite one
+            self.positions = np.concatenate([self.positions + (dx, dy) for dx in (-right, 0, right)
+                                             for dy in (-bottom, 0, bottom)])
+        else:
+            self.tile_size = (tile_size, tile_size)
+            self.period = None
+
+    def tile(self, tx, ty):
+        key = (tx, ty)
+        if key not in self.tiles:
+            width, height = self.tile_size
+            x0, y0 = tx * width, ty * height
+            x, y = self.positions[:, 0], self.positions[:, 1]
+            inside = ((x >= x0 - self.radius) & (x < x0 + width + self.radius) &
+                      (y >= y0 - self.radius) & (y < y0 + height + self.radius))
+            surface = None
+            if inside.any():
+                surface = pygame.Surface((width, height))
+                surface.set_colorkey((0, 0, 0), pygame.RLEACCEL)
+                for sx, sy in self.positions[inside]:
+                    pygame.draw.circle(surface, self.color, (int(sx) - x0, int(sy) - y0), self.radius)
+            self.tiles[key] = surface
+        return self.tiles[key]
+
+    def draw(self, surface, camera_offset):
+        tile_width, tile_height = self.tile_size
+        ox = camera_offset.x * self.parallax
+        oy = camera_offset.y * self.parallax
+        width, height = surface.get_size()
+        for tx in range(math.floor(ox / tile_width), math.floor((ox + width) / tile_width) + 1):
+            for ty in range(math.floor(oy / tile_height), math.floor((oy + height) / tile_height) + 1):
+                tile = self.tile(tx % self.period[0], ty % self.period[1]) if self.period else self.tile(tx, ty)
+                if tile is not None:
+                    surface.blit(tile, (round(tx * tile_width - ox), round(ty * tile_height - oy)))
+
+class Starfield:
+    def __init__(self, layers):
+        self.layers = sorted(layers, key=lambda layer: layer.parallax) # farthest first
+
+    def draw(self, surface, camera_offset):
+        for layer in self.layers:
+            layer.draw(surface, camera_offset)
@@ -0,0 +1,21 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # the scenes draw, but no window is needed
+
+import pygame
+import pytest
+
+from allocations import SCENARIOS, measure, over_budget
+
+@pytest.fixture(scope="module", autouse=True)
+def display():
+    pygame.display.init()
+    pygame.font.init()
+    yield
+    pygame.quit()
+
+@pytest.mark.parametrize("scenario", sorted(SCENARIOS))
+def test_frame_phases_stay_within_allocation_budgets(scenario):
+    sweep, count = SCENARIOS[scenario]
+    phases, _ = measure(sweep, count, seed=0, frames=60, warmup=30)
+    assert phases, "no phases were measured"
+    assert over_budget(scenario, phases) == []
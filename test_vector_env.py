@@ -0,0 +1,33 @@
+import multiprocessing as mp
+import os
+import signal
+
+import numpy as np
+import pytest
+
+from vector_env import VectorEnv
+from world import GameWorld
+
+def step_endless_env_after_parent_world(results):
+    os.setpgrp() # so a hung run can be killed along with its workers
+    # the parent's world starts the sector worker thread before the env forks its workers
+    GameWorld(0).step(set())
+    with VectorEnv(2, 1, endless=True) as env:
+        for _ in range(10):
+            obs, dones = env.step(np.zeros(2, dtype=np.int64))
+        results.put(obs.shape)
+
+@pytest.mark.skipif("fork" not in mp.get_all_start_methods(), reason="needs fork-started workers")
+def test_endless_workers_start_after_parent_built_a_world():
+    # run in a child so a regression fails the test instead of hanging the suite
+    context = mp.get_context("fork")
+    results = context.Queue()
+    process = context.Process(target=step_endless_env_after_parent_world, args=(results,))
+    process.start()
+    process.join(60)
+    if process.is_alive():
+        os.killpg(process.pid, signal.SIGKILL)
+        process.join()
+        pytest.fail("endless vector env workers hung")
+    assert process.exitcode == 0
+    assert results.get(timeout=1) == (2, 17)
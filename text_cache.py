@@ -0,0 +1,58 @@
+import pygame
+from collections import OrderedDict
+
+TEXT_CACHE_SIZE = 512
+
+fonts = {}
+
+def get_font(size, name=None):
+    font = fonts.get((name, size))
+    if font is None:
+        font = fonts[(name, size)] = pygame.font.SysFont(name, size)
+    return font
+
+def preload_fonts(specs):
+    # open (name, size) fonts ahead of time; the first SysFont call scans the system's
+    # fonts, which is slow enough to stall a frame. Needs pygame.font.init() first.
+    for name, size in specs:
+        get_font(size, name)
+
+class TextCache:
+    # LRU of rendered text surfaces keyed by (font, text, colour)
+    def __init__(self, capacity=TEXT_CACHE_SIZE):
+        self.capacity = capacity
+        self.surfaces = OrderedDict()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, size, text, color, name=None):
+        key = (name, size, text, tuple(color))
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+        self.misses += 1
+        surface = get_font(size, name).render(text, True, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.capacity:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'size': len(self.surfaces),
+            'capacity': self.capacity,
+        }
+
+text_cache = TextCache()
+
+def render_text(size, text, color):
+    return text_cache.render(size, text, color)
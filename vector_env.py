@@ -0,0 +1,178 @@
+import argparse
+import multiprocessing as mp
+import time
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from world import GameWorld, mask_to_inputs
+
+OBSERVATION_FIELDS = [
+    'x', 'y', 'vx', 'vy', 'angle', 'fuel', 'oxygen', 'hull', 'cash', 'landed',
+    'goal_dx', 'goal_dy', 'planet_dx', 'planet_dy', 'enemies', 'levels_completed', 'frame',
+]
+OBSERVATION_SIZE = len(OBSERVATION_FIELDS)
+
+def observe(world, out):
+    ship = world.ship
+    goal = world.goal_planet.position - ship.position
+    planet = world.closest_unharvested_planet()
+    planet = planet.position - ship.position if planet else goal * 0
+    out[:] = (ship.position.x, ship.position.y, ship.velocity.x, ship.velocity.y, ship.angle,
+              ship.fuel, ship.oxygen, ship.hull, ship.cash, ship.landed,
+              goal.x, goal.y, planet.x, planet.y, len(world.enemy_ships), world.levels_completed, world.frame)
+
+def env_seed(seed, index, episode):
+    return f"{seed}-{index}-{episode}"
+
+class Shard:
+    # the worlds one worker owns; auto-resets a world with a fresh seed when its run ends
+    def __init__(self, start, stop, seed, world_kwargs):
+        self.start = start
+        self.seed = seed
+        self.episodes = [0] * (stop - start)
+        self.worlds = [GameWorld(env_seed(seed, i, 0), prefetch=False, **world_kwargs) for i in range(start, stop)]
+
+    def reset(self, obs):
+        for k, world in enumerate(self.worlds):
+            world.reset(env_seed(self.seed, self.start + k, self.episodes[k]))
+            observe(world, obs[self.start + k])
+
+    def step(self, actions, obs, dones):
+        for k, world in enumerate(self.worlds):
+            i = self.start + k
+            world.step(mask_to_inputs(int(actions[i])))
+            dones[i] = world.game_over
+            if world.game_over:
+                self.episodes[k] += 1
+                world.reset(env_seed(self.seed, i, self.episodes[k]))
+            observe(world, obs[i])
+
+def views(blocks, num_envs):
+    obs = np.ndarray((num_envs, OBSERVATION_SIZE), dtype=np.float64, buffer=blocks[0].buf)
+    actions = np.ndarray((num_envs,), dtype=np.int64, buffer=blocks[1].buf)
+    dones = np.ndarray((num_envs,), dtype=np.bool_, buffer=blocks[2].buf)
+    return obs, actions, dones
+
+def worker(conn, names, num_envs, start, stop, seed, world_kwargs):
+    blocks = [SharedMemory(name=name) for name in names]
+    obs, actions, dones = views(blocks, num_envs)
+    try:
+        shard = Shard(start, stop, seed, world_kwargs)
+        while True:
+            command = conn.recv()
+            if command == 'step':
+                shard.step(actions, obs, dones)
+            elif command == 'reset':
+                shard.reset(obs)
+            conn.send(command)
+            if command == 'close':
+                break
+    finally:
+        del obs, actions, dones
+        for block in blocks:
+            block.close()
+
+class VectorEnv:
+    # num_envs independent seeded worlds stepped together; worlds are split into contiguous
+    # shards, one per worker process, and observations, actions and done flags live in shared
+    # memory so a step only sends one short message per worker.
+    # actions are ACTIONS bitmasks (see world.inputs_to_mask); num_workers=0 steps in-process
+    def __init__(self, num_envs, num_workers=None, seed=0, **world_kwargs):
+        if num_workers is None:
+            num_workers = min(num_envs, mp.cpu_count())
+        self.num_envs = num_envs
+        self.num_workers = num_workers
+        sizes = [num_envs * OBSERVATION_SIZE * 8, num_envs * 8, num_envs]
+        self.blocks = [SharedMemory(create=True, size=max(1, size)) for size in sizes]
+        self.obs, self.actions, self.dones = views(self.blocks, num_envs)
+        self.actions[:] = 0
+        self.shards = []
+        self.workers = []
+
+        bounds = np.linspace(0, num_envs, max(1, num_workers) + 1).astype(int)
+        try:
+            if num_workers == 0:
+                self.shards = [Shard(0, num_envs, seed, world_kwargs)]
+            else:
+                for start, stop in zip(bounds[:-1], bounds[1:]):
+                    parent, child = mp.Pipe()
+                    process = mp.Process(target=worker, daemon=True,
+                                         args=(child, [b.name for b in self.blocks], num_envs, start, stop, seed, world_kwargs))
+                    process.start()
+                    child.close() # the worker holds the other end; a dead worker then reads as EOF, not a hang
+                    self.workers.append((process, parent))
+            self.reset()
+        except BaseException:
+            self.close()
+            raise
+
+    def broadcast(self, command):
+        for process, conn in self.workers:
+            try:
+                conn.send(command)
+            except ConnectionError:
+                raise RuntimeError(f"vector env worker {process.pid} exited") from None
+        for process, conn in self.workers:
+            try:
+                conn.recv()
+            except (ConnectionError, EOFError):
+                raise RuntimeError(f"vector env worker {process.pid} exited") from None
+
+    def reset(self):
+        for shard in self.shards:
+            shard.reset(self.obs)
+        self.broadcast('reset')
+        return self.obs
+
+    def step(self, actions):
+        # the returned arrays are shared and overwritten by the next step; copy to keep them
+        self.actions[:] = actions
+        for shard in self.shards:
+            shard.step(self.actions, self.obs, self.dones)
+        self.broadcast('step')
+        return self.obs, self.dones
+
+    def close(self):
+        try:
+            for process, conn in self.workers:
+                try:
+                    conn.send('close')
+                    conn.recv()
+                except (ConnectionError, EOFError):
+                    pass # already gone, e.g. its worlds failed to build
+                conn.close()
+                process.join()
+        finally:
+            self.workers = []
+            del self.obs, self.actions, self.dones
+            for block in self.blocks:
+                block.close()
+                block.unlink()
+            self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="measure batched environment throughput")
+    parser.add_argument("--envs", type=int, default=64)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 1, 2, 4])
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    for workers in args.workers:
+        with VectorEnv(args.envs, workers, seed=args.seed) as env:
+            start = time.perf_counter()
+            for _ in range(args.steps):
+                env.step(rng.integers(0, 1 << 7, size=args.envs)) # random held-key combinations, no shop/physics keys
+            elapsed = time.perf_counter() - start
+        print(f"{args.envs} envs, {workers} workers: {args.envs * args.steps / elapsed:.0f} env steps/s")
+
+if __name__ == "__main__":
+    main()
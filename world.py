@@ -0,0 +1,1797 @@
+import pygame
+import math
+import random
+import os
+import time
+import numpy as np
+from itertools import chain
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from text_cache import render_text
+
+PLAYING_FIELD_WIDTH = 3000
+PLAYING_FIELD_HEIGHT = 15000
+G = 6.674e-3
+MAX_SPEED = 5
+BATCHED_PHYSICS = True # advance every body in one numpy pass per motion model
+
+NUM_PLANETS = 10
+MIN_PLANET_DISTANCE = 1500
+NUM_ASTEROIDS = 35
+NUM_ENEMY_SHIPS = 12
+MAX_ENEMY_SHIPS = 50
+GRAVITY_SOLVER = 'direct' # or 'barnes_hut'
+BARNES_HUT_THETA = 0.5 # opening angle: a node counts as one mass once width / distance < theta
+BARNES_HUT_LEAF_SIZE = 8
+MASSIVE_SOURCE_MASS = 1000 # asteroids and planets are above this, ships and enemy ships are not
+DIRECT_GRAVITY_PAIRS = 1 << 21 # target-source pairs per block of the direct sum, bounds its memory
+BROADPHASE_CELL_SIZE = 400
+PLANET_INDEX_CELL_SIZE = 1000 # wider than the biggest planet so most bodies touch at most 4 cells
+OXYGEN_GRACE_FRAMES = 300 # 5 seconds at 60 fps without air before the run ends
+SHIP_SPACING = 20 # degrees around the starting planet between co-op ships
+
+# endless sectors (GameWorld(endless=True)) stream square chunks of space instead of one fixed field
+CHUNK_SIZE = 4000
+CHUNK_ACTIVE_RADIUS = 1 # chunks within this many of the ship's are simulated
+CHUNK_PREFETCH_RADIUS = 2 # chunks within this many are built ahead on the sector worker
+CHUNK_FROZEN_LIMIT = 64 # frozen chunks kept; the least recently left beyond this come back fresh from their seed
+CHUNK_PLANETS = 2
+CHUNK_ASTEROIDS = 6
+CHUNK_ENEMY_SHIPS = 2
+CHUNK_SHOP_CHANCE = 0.3
+ENDLESS_GOAL_DISTANCE = 12 # chunks from the starting planet to the goal
+
+# sleeping (GameWorld(sleeping=True)): asteroids and enemies this far from the ship for
+# SLEEP_FRAMES steps in a row stop being integrated, steered and collided with each other
+SLEEP_DISTANCE = 3000
+WAKE_DISTANCE = 2500 # closer than this wakes them; the gap keeps bodies from flickering at the edge
+SLEEP_FRAMES = 60
+SHOT_WAKE_DISTANCE = 400 # a shot this close wakes a sleeper before it can hit
+
+SHOP_UPGRADES = ['max_fuel', 'max_hull', 'thrust', 'shoot_delay', 'oxygen_efficiency']
+# every action GameWorld.step understands, in bit order for compact input masks
+ACTIONS = ['left', 'right', 'thrust', 'thrust_down', 'thrust_up', 'shoot', 'refill',
+           'select_1', 'select_2', 'select_3', 'select_4', 'select_5', 'restart']
+
+def inputs_to_mask(inputs):
+    return sum(1 << bit for bit, action in enumerate(ACTIONS) if action in inputs)
+
+def mask_to_inputs(mask):
+    return {action for bit, action in enumerate(ACTIONS) if mask >> bit & 1}
+
+class MotionModel:
+    def apply(self, obj, world): pass
+
+    def integrate(self, pos, vel, acc, thrusting, sources, max_speed, dt=1.0):
+        # sources is the world's GravitySources; dt is in frames, substeps pass a fraction of one
+        return pos, vel, np.zeros_like(pos)
+
+    def apply_batch(self, bodies, world, dt=1.0):
+        bodies = movable(bodies)
+        if not bodies:
+            return
+        pos, vel, net = self.integrate(
+            gather_vectors(bodies, 'position'),
+            gather_vectors(bodies, 'velocity'),
+            gather_vectors(bodies, 'acceleration'),
+            np.array([b.thrusting for b in bodies], dtype=bool),
+            world.gravity_sources(), world.max_speed, dt)
+        write_back(bodies, pos, vel, net)
+
+def gather_vectors(bodies, attr):
+    # Vector2 iterates as x, y, so one flat pass fills the array without per-body tuples
+    flat = chain.from_iterable(getattr(b, attr) for b in bodies)
+    return np.fromiter(flat, dtype=float, count=2 * len(bodies)).reshape(-1, 2)
+
+def gather_sources(all_bodies):
+    return gather_vectors(all_bodies, 'position'), np.array([b.mass for b in all_bodies], dtype=float)
+
+def direct_gravity(pos, src_pos, src_mass):
+    # pairwise gravity in blocks of targets, r2 > 1 also drops each body's pull on itself
+    gravity = np.zeros_like(pos)
+    rows = max(1, DIRECT_GRAVITY_PAIRS // max(len(src_pos), 1))
+    for start in range(0, len(pos), rows):
+        r_vec = src_pos[None, :, :] - pos[start:start + rows, None, :]
+        r2 = np.einsum('ijk,ijk->ij', r_vec, r_vec)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scale = np.where(r2 > 1, G * src_mass / (r2 * np.sqrt(r2)), 0.0)
+        gravity[start:start + rows] = np.einsum('ij,ijk->ik', scale, r_vec)
+    return gravity
+
+class QuadTree:
+    # Barnes-Hut tree over point masses: bodies are reordered so every node owns the
+    # contiguous slice [start, end) of self.pos/self.mass, and leaves hold at most leaf_size
+    def __init__(self, positions, masses, leaf_size=BARNES_HUT_LEAF_SIZE, max_depth=24):
+        self.leaf_size = leaf_size
+        self.max_depth = max_depth
+        order = []
+        self.com = []
+        self.node_mass = []
+        self.width = []
+        self.start = []
+        self.end = []
+        self.children = []
+        if len(positions):
+            low = positions.min(axis=0)
+            width = float((positions.max(axis=0) - low).max()) + 1e-9
+            self.build(positions, masses, np.arange(len(positions)), low[0], low[1], width, 0, order)
+        order = np.array(order, dtype=int)
+        self.pos = positions[order]
+        self.mass = masses[order]
+        self.com = np.array(self.com, dtype=float).reshape(-1, 2)
+        self.node_mass = np.array(self.node_mass, dtype=float)
+        self.width = np.array(self.width, dtype=float)
+        self.start = np.array(self.start, dtype=int)
+        self.end = np.array(self.end, dtype=int)
+        self.children = np.array(self.children, dtype=int).reshape(-1, 4)
+        self.leaf = (self.children < 0).all(axis=1)
+
+    def build(self, positions, masses, idx, x0, y0, width, depth, order):
+        node = len(self.width)
+        m = masses[idx]
+        total = float(m.sum())
+        p = positions[idx]
+        self.com.append(tuple((p * m[:, None]).sum(axis=0) / total) if total > 0 else tuple(p.mean(axis=0)))
+        self.node_mass.append(total)
+        self.width.append(width)
+        self.start.append(len(order))
+        self.end.append(0)
+        self.children.append([-1, -1, -1, -1])
+        if len(idx) <= self.leaf_size or depth == self.max_depth:
+            order.extend(idx.tolist())
+        else:
+            half = width / 2
+            quadrant = (p[:, 0] >= x0 + half) + 2 * (p[:, 1] >= y0 + half)
+            for q in range(4):
+                sub = idx[quadrant == q]
+                if len(sub):
+                    self.children[node][q] = self.build(positions, masses, sub, x0 + half * (q & 1),
+                                                        y0 + half * (q >> 1), half, depth + 1, order)
+        self.end[node] = len(order)
+        return node
+
+    def acceleration(self, pos, theta=BARNES_HUT_THETA, block=4096):
+        gravity = np.zeros_like(pos)
+        if len(self.width):
+            for start in range(0, len(pos), block):
+                gravity[start:start + block] = self.walk(pos[start:start + block], theta)
+        return gravity
+
+    def walk(self, pos, theta):
+        # walk the tree for every target at once: each round, (target, node) pairs either
+        # accept the node's centre of mass, sum a near leaf's bodies directly, or open to children
+        n = len(pos)
+        ax = np.zeros(n)
+        ay = np.zeros(n)
+        targets = np.arange(n)
+        nodes = np.zeros(n, dtype=int)
+        theta2 = theta * theta
+        while len(targets):
+            r_vec = self.com[nodes] - pos[targets]
+            r2 = np.einsum('ij,ij->i', r_vec, r_vec)
+            far = self.width[nodes] ** 2 < theta2 * r2
+            self.accumulate(ax, ay, targets[far], r_vec[far], r2[far], self.node_mass[nodes[far]])
+
+            leaf = ~far & self.leaf[nodes]
+            leaf_targets = targets[leaf]
+            leaf_nodes = nodes[leaf]
+            counts = self.end[leaf_nodes] - self.start[leaf_nodes]
+            pair_targets = np.repeat(leaf_targets, counts)
+            offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            bodies = np.repeat(self.start[leaf_nodes], counts) + offsets
+            body_vec = self.pos[bodies] - pos[pair_targets]
+            self.accumulate(ax, ay, pair_targets, body_vec, np.einsum('ij,ij->i', body_vec, body_vec),
+                            self.mass[bodies])
+
+            opened = ~far & ~self.leaf[nodes]
+            children = self.children[nodes[opened]].ravel()
+            targets = np.repeat(targets[opened], 4)[children >= 0]
+            nodes = children[children >= 0]
+        return np.stack([ax, ay], axis=1)
+
+    def accumulate(self, ax, ay, targets, r_vec, r2, mass):
+        near = r2 > 1
+        targets, r_vec, r2 = targets[near], r_vec[near], r2[near]
+        scale = G * mass[near] / (r2 * np.sqrt(r2))
+        ax += np.bincount(targets, scale * r_vec[:, 0], minlength=len(ax))
+        ay += np.bincount(targets, scale * r_vec[:, 1], minlength=len(ay))
+
+class GravitySources:
+    # the bodies that pull on others this pass; the quadtree is only built if something asks
+    def __init__(self, positions, masses, solver=GRAVITY_SOLVER, theta=BARNES_HUT_THETA):
+        self.positions = positions
+        self.masses = masses
+        self.solver = solver
+        self.theta = theta
+        self.tree = None
+
+    def acceleration(self, pos):
+        if self.solver == 'direct':
+            return direct_gravity(pos, self.positions, self.masses)
+        if self.tree is None:
+            self.tree = QuadTree(self.positions, self.masses)
+        return self.tree.acceleration(pos, self.theta)
+
+def clamp_speed(velocities, max_speed):
+    speeds = np.hypot(velocities[:, 0], velocities[:, 1])
+    too_fast = speeds > max_speed
+    velocities[too_fast] *= (max_speed / speeds[too_fast])[:, None]
+    return velocities
+
+def movable(bodies):
+    return [b for b in bodies if not (isinstance(b, Ship) and b.landed)]
+
+def write_back(bodies, positions, velocities, net_accelerations):
+    for i, obj in enumerate(bodies):
+        obj.position.update(positions[i, 0], positions[i, 1])
+        obj.velocity.update(velocities[i, 0], velocities[i, 1])
+        obj.net_acceleration.update(net_accelerations[i, 0], net_accelerations[i, 1])
+
+class NewtonianMotion(MotionModel):
+    def apply(self, obj, world):
+        if isinstance(obj, Ship) and obj.landed:
+            return
+        obj.net_acceleration = pygame.Vector2(0, 0)
+        for other in world.all_bodies:
+            if other is obj: continue
+            r_vec = other.position - obj.position
+            r2 = r_vec.length_squared()
+            if r2 > 1:
+                force_mag = G * other.mass / r2
+                acc = r_vec.normalize() * force_mag
+                obj.net_acceleration += acc
+                obj.velocity += acc
+        obj.velocity += obj.acceleration
+        obj.net_acceleration += obj.acceleration
+        obj.position += obj.velocity
+        if obj.velocity.length() > world.max_speed:
+            obj.velocity.scale_to_length(world.max_speed)
+
+    def integrate(self, pos, vel, acc, thrusting, sources, max_speed, dt=1.0):
+        gravity = sources.acceleration(pos)
+        net = gravity + acc
+        vel = vel + net * dt
+        pos = pos + vel * dt
+        return pos, clamp_speed(vel, max_speed), net
+
+class BuridanMotion(MotionModel):
+    def apply(self, obj, world):
+        if isinstance(obj, Ship) and obj.landed:
+            return
+        obj.net_acceleration = pygame.Vector2(0, 0)
+        obj.velocity *= 0.9999
+        gravity_force = pygame.Vector2(0, 1) * 0.1
+        obj.net_acceleration += gravity_force
+        obj.velocity += gravity_force
+        obj.velocity += obj.acceleration
+        obj.net_acceleration += obj.acceleration
+        obj.position += obj.velocity
+        if obj.velocity.length() > world.max_speed:
+            obj.velocity.scale_to_length(world.max_speed)
+
+    def integrate(self, pos, vel, acc, thrusting, sources, max_speed, dt=1.0):
+        gravity_force = np.array([0.0, 0.1])
+        net = gravity_force + acc
+        vel = vel * 0.9999 ** dt + net * dt
+        pos = pos + vel * dt
+        return pos, clamp_speed(vel, max_speed), net
+
+class AristotelianMotion(MotionModel):
+    def apply(self, obj, world):
+        if isinstance(obj, Ship) and obj.landed:
+            return
+        obj.net_acceleration = pygame.Vector2(0, 0)
+        gravity_acc = pygame.Vector2(0, 0) * 0.5 * obj.mass / 100 if obj.natural else pygame.Vector2(0, 0)
+        obj.net_acceleration += gravity_acc
+        if obj.thrusting:
+            thrust_acc = obj.acceleration * 25
+            obj.velocity = thrust_acc + gravity_acc
+        else:
+            obj.velocity += obj.net_acceleration
+            if gravity_acc.length_squared() == 0:
+                obj.velocity = pygame.Vector2(0, 0)
+        obj.position += obj.velocity
+        if obj.velocity.length() > world.max_speed:
+            obj.velocity.scale_to_length(world.max_speed)
+
+    def integrate(self, pos, vel, acc, thrusting, sources, max_speed, dt=1.0):
+        # same zero "natural place" pull as apply(), kept so the two paths stay in step
+        gravity_acc = np.zeros_like(pos)
+        net = gravity_acc.copy()
+        resting = np.einsum('ij,ij->i', gravity_acc, gravity_acc) == 0
+        vel = np.where(thrusting[:, None], acc * 25 + gravity_acc,
+                       np.where(resting[:, None], 0.0, vel + net * dt))
+        pos = pos + vel * dt
+        return pos, clamp_speed(vel, max_speed), net
+
+class PhysicsBody:
+    __slots__ = ('position', 'velocity', 'acceleration', 'net_acceleration', 'radius', 'angle', 'thrusting',
+                 'motion_model', 'mass', 'natural', 'impetus', 'handle', 'alive', 'previous_position',
+                 'asleep', 'far_frames')
+
+    def __init__(self, x, y, radius, motion_model):
+        self.position = pygame.Vector2(x, y)
+        self.velocity = pygame.Vector2(0, 0)
+        self.acceleration = pygame.Vector2(0, 0)
+        self.net_acceleration = pygame.Vector2(0, 0)
+        self.radius = radius
+        self.angle = 0
+        self.thrusting = False
+        self.motion_model = motion_model
+        self.mass = self.radius ** 2
+        self.natural = False
+        self.impetus = pygame.Vector2(0, 0)
+        self.handle = None
+        self.alive = True
+        self.previous_position = pygame.Vector2(x, y) # where the last step started, for render interpolation
+        self.asleep = False
+        self.far_frames = 0 # consecutive steps spent beyond SLEEP_DISTANCE
+
+    static = False # static bodies are gravity sources but never integrated
+    draw_margin = 0 # how far past its radius draw() paints (bars, flames, labels)
+
+    def update(self, world):
+        self.begin_update(world)
+        if not self.static:
+            self.motion_model.apply(self, world)
+        self.end_update(world)
+
+    def begin_update(self, world):
+        if isinstance(self.motion_model, AristotelianMotion):
+            self.impetus.update(self.velocity)
+        else:
+            if self.impetus.length_squared() > 0:
+                self.velocity = pygame.Vector2(self.impetus)
+                self.impetus.update(0, 0)
+
+    def end_update(self, world):
+        pass
+
+    def draw(self, surface, camera_offset):
+        screen_pos = self.position - camera_offset
+        pygame.draw.circle(surface, (0, 0, 0), (int(screen_pos.x), int(screen_pos.y)), self.radius)
+
+    def check_collision(self, other):
+        if isinstance(self, Planet) and self.is_goal:
+            return False
+        if isinstance(other, Planet) and other.is_goal:
+            return False
+        return self.position.distance_to(other.position) < self.radius + other.radius
+
+# hull and exhaust outlines of the player and enemy ships, pointing up, before rotation
+SHIP_POINTS = (pygame.Vector2(0, -10), pygame.Vector2(5, 10), pygame.Vector2(-5, 10))
+FLAME_POINTS = (pygame.Vector2(0, 15), pygame.Vector2(-3, 10), pygame.Vector2(3, 10))
+
+class Ship(PhysicsBody):
+    __slots__ = ('thrust_force', 'thrust_force_min', 'thrust_force_max', 'thrust_force_step', 'landed', 'fuel',
+                 'oxygen', 'hull', 'resource_transfer_rate', 'cash', 'shoot_cooldown', 'shoot_delay', 'projectiles',
+                 'max_fuel', 'max_hull', 'oxygen_depletion_rate', 'min_depletion_rate', 'max_speed', 'current_planet',
+                 'oxygen_out_since', 'parked')
+    draw_margin = 40
+
+    def __init__(self, motion_model):
+        super().__init__(0, 0, 10, motion_model)
+        self.thrust_force = 50
+        self.thrust_force_min = 1
+        self.thrust_force_max = 100
+        self.thrust_force_step = 1
+        self.mass = 100
+        self.natural = True
+        self.landed = False
+        self.fuel = 100
+        self.oxygen = 100
+        self.hull = 100
+        self.resource_transfer_rate = 1
+        self.cash = 1000
+        self.shoot_cooldown = 0
+        self.shoot_delay = 10
+        self.projectiles = ProjectilePool()
+        self.max_fuel = 100
+        self.max_hull = 100
+        self.oxygen_depletion_rate = 0.05
+        self.min_depletion_rate = 0.01
+        self.max_speed = MAX_SPEED # speed cap for every body in the sector, raised by thrust upgrades
+        self.current_planet = None
+        self.oxygen_out_since = None # frame the oxygen ran out, for OXYGEN_GRACE_FRAMES
+        self.parked = False # left idle on the starting planet by GameWorld.park_ship
+
+    def rotate(self, direction):
+        if self.landed: return
+        if self.fuel > 0:
+            self.angle += direction * 3
+            self.fuel = max(0, self.fuel - 0.05)
+        else:
+            self.angle += direction * 1
+
+    def apply_thrust(self):
+        if not self.landed and self.fuel > 0:
+            rad = math.radians(self.angle)
+            thrust_vector = pygame.Vector2(math.sin(rad), -math.cos(rad)) * self.thrust_force / 100
+            self.acceleration = thrust_vector
+            self.thrusting = True
+            self.fuel = max(0, self.fuel - self.thrust_force * 0.001)
+
+    def stop_thrust(self):
+        self.acceleration = pygame.Vector2(0, 0)
+        self.thrusting = False
+
+    def land(self, planet):
+        self.landed = True
+        self.velocity = pygame.Vector2(0, 0)
+        self.acceleration = pygame.Vector2(0, 0)
+        direction_to_planet = (self.position - planet.position).normalize()
+        self.position = planet.position + direction_to_planet * (planet.radius + self.radius)
+        self.current_planet = planet
+        planet.harvested = True
+
+    def take_off(self):
+        self.landed = False
+        rad = math.radians(self.angle)
+        launch_vector = pygame.Vector2(math.sin(rad), -math.cos(rad)) * 5
+        self.velocity += launch_vector
+
+    def begin_update(self, world):
+        super().begin_update(world)
+        self.shoot_cooldown = max(0, self.shoot_cooldown - 1)
+
+    def end_update(self, world):
+        if not self.landed and self.oxygen > 0:
+            self.oxygen = round(max(0, self.oxygen - self.oxygen_depletion_rate), 2)
+
+        if self.landed and self.current_planet:
+            # Resource transfer logic
+            fuel_needed = self.max_fuel - self.fuel
+            oxygen_needed = 100 - self.oxygen
+            hull_needed = self.max_hull - self.hull
+            ore_to_take = min(hull_needed, self.resource_transfer_rate, self.current_planet.ore)
+            self.hull = round(min(self.max_hull, self.hull + ore_to_take), 2)
+            self.current_planet.ore = round(self.current_planet.ore - ore_to_take, 2)
+
+            
+            if self.hull >= self.max_hull and self.current_planet.ore > 0:
+                ore_to_cash = min(self.current_planet.ore, self.resource_transfer_rate)
+                self.cash += ore_to_cash
+                self.current_planet.ore = round(self.current_planet.ore - ore_to_cash, 2)
+
+            fuel_to_take = min(fuel_needed, self.resource_transfer_rate, self.current_planet.fuel)
+            oxygen_to_take = min(oxygen_needed, self.resource_transfer_rate, self.current_planet.oxygen)
+            self.fuel = round(self.fuel + fuel_to_take, 2)
+            self.oxygen = round(self.oxygen + oxygen_to_take, 2)
+            self.fuel = round(min(self.max_fuel, self.fuel + fuel_to_take), 2)
+            self.oxygen = round(min(100, self.oxygen + oxygen_to_take), 2)
+            if (self.current_planet.fuel <= 0 and 
+                self.current_planet.oxygen <= 0 and 
+                self.current_planet.ore <= 0):
+                self.current_planet = None
+
+    def take_damage(self, collision_force):
+        self.hull = max(0, self.hull - collision_force * 10)
+
+    def shoot(self):
+        if self.shoot_cooldown == 0:
+            rad = math.radians(self.angle)
+            nose_offset = pygame.Vector2(math.sin(rad), -math.cos(rad)) * self.radius
+            self.projectiles.spawn(self.position.x + nose_offset.x,
+                                   self.position.y + nose_offset.y,
+                                   self.angle, self.motion_model)
+            self.shoot_cooldown = self.shoot_delay
+
+    def buy_upgrade(self, upgrade_type):
+        if not self.current_planet or not self.current_planet.is_shop:
+            return False
+        if upgrade_type not in self.current_planet.upgrades:
+            return False
+        cost, amount = self.current_planet.upgrades[upgrade_type]
+        if self.cash < cost:
+            return False
+        self.cash -= cost
+        if upgrade_type == 'max_fuel':
+            self.max_fuel += amount
+            self.fuel = min(self.fuel, self.max_fuel)
+        elif upgrade_type == 'max_hull':
+            self.max_hull += amount
+            self.hull = min(self.hull, self.max_hull)
+        elif upgrade_type == 'thrust':
+            self.thrust_force_max += amount
+            self.max_speed += amount / 10
+        elif upgrade_type == 'shoot_delay':
+            self.shoot_delay = max(5, self.shoot_delay + amount)
+        elif upgrade_type == 'oxygen_efficiency':
+            self.oxygen_depletion_rate = max(self.min_depletion_rate, self.oxygen_depletion_rate - amount)
+        return True
+
+    def draw(self, surface, camera_offset):
+        self.projectiles.draw(surface, camera_offset)
+        origin = self.position - camera_offset
+        rotated_points = [p.rotate(self.angle) + origin for p in SHIP_POINTS]
+        pygame.draw.polygon(surface, (255, 255, 255), rotated_points)
+        if self.thrusting:
+            rotated_flame = [p.rotate(self.angle) + origin for p in FLAME_POINTS]
+            pygame.draw.polygon(surface, (255, 165, 0), rotated_flame)
+        fuel_bar_width = 40
+        fuel_bar_height = 5
+        fuel_bar_x = self.position.x - camera_offset.x - fuel_bar_width // 2
+        fuel_bar_y = self.position.y - camera_offset.y - self.radius - 15
+        fuel_percentage = self.fuel / self.max_fuel
+        pygame.draw.rect(surface, (255, 0, 0), (fuel_bar_x, fuel_bar_y, fuel_bar_width, fuel_bar_height))
+        pygame.draw.rect(surface, (0, 255, 0), (fuel_bar_x, fuel_bar_y, fuel_bar_width * fuel_percentage, fuel_bar_height))
+        oxygen_bar_width = 40
+        oxygen_bar_height = 5
+        oxygen_bar_x = self.position.x - camera_offset.x - oxygen_bar_width // 2
+        oxygen_bar_y = self.position.y - camera_offset.y - self.radius - 25
+        oxygen_percentage = self.oxygen / 100
+        pygame.draw.rect(surface, (255, 0, 0), (oxygen_bar_x, oxygen_bar_y, oxygen_bar_width, oxygen_bar_height))
+        pygame.draw.rect(surface, (0, 0, 255), (oxygen_bar_x, oxygen_bar_y, oxygen_bar_width * oxygen_percentage, oxygen_bar_height))
+        hull_bar_width = 40
+        hull_bar_height = 5
+        hull_bar_x = self.position.x - camera_offset.x - hull_bar_width // 2
+        hull_bar_y = self.position.y - camera_offset.y - self.radius - 35
+        hull_percentage = self.hull / self.max_hull
+        pygame.draw.rect(surface, (255, 0, 0), (hull_bar_x, hull_bar_y, hull_bar_width, hull_bar_height))
+        pygame.draw.rect(surface, (255, 255, 0), (hull_bar_x, hull_bar_y, hull_bar_width * hull_percentage, hull_bar_height))
+
+class PhysicsObject(PhysicsBody):
+    __slots__ = ()
+
+class Planet(PhysicsBody):
+    __slots__ = ('color', 'fuel', 'oxygen', 'ore', 'harvested', 'is_shop', 'is_goal', 'upgrades')
+    def __init__(self, x, y, radius, motion_model, color, goal_planet=None, rng=random):
+        super().__init__(x, y, radius, motion_model)
+        self.mass = (self.radius ** 2) * 100
+        self.color = color
+        self.fuel = rng.randint(10, 50)
+        self.oxygen = rng.randint(10, 50)
+        self.ore = rng.randint(10, 50)
+        self.harvested = False
+        self.is_shop = False
+        self.is_goal = bool(goal_planet)
+        self.upgrades = {}
+        if goal_planet:
+            self.mass *= 10
+
+    def setup_as_shop(self):
+        # print("Setting up planet as shop")
+        self.is_shop = True
+        self.color = (218, 165, 32)
+        self.fuel = 100
+        self.oxygen = 100
+        self.ore = 100
+        self.upgrades = {
+            'max_fuel': (50, 25),
+            'max_hull': (75, 25),
+            'thrust': (100, 25),
+            'shoot_delay': (150, -2),
+            'oxygen_efficiency': (200, 0.01),
+        }
+
+    static = True
+    draw_margin = 250 # the resource label runs well past the planet's right edge
+
+    def begin_update(self, world):
+        if not self.harvested and self.fuel <= 0 and self.oxygen <= 0 and self.ore <= 0:
+            self.harvested = True
+            world.planet_index.discard(self)
+
+    def draw(self, surface, camera_offset):
+        screen_pos = self.position - camera_offset
+        if self.is_goal:
+            for i in range(10):
+                alpha = 255 - (i * 25)
+                color = (0, 255, 255, alpha)
+                pygame.draw.circle(surface, color, (int(screen_pos.x), int(screen_pos.y)), self.radius - i * 5, 1)
+        else:
+            pygame.draw.circle(surface, self.color, (int(screen_pos.x), int(screen_pos.y)), self.radius)
+
+        if not self.is_goal:
+            resource_text = f"Fuel: {self.fuel:.2f}, O2: {self.oxygen:.2f}, Ore: {self.ore:.2f}"
+            text_surface = render_text(18, resource_text, (255, 255, 255))
+            surface.blit(text_surface, (screen_pos.x - self.radius, screen_pos.y - self.radius - 10))
+
+        if self.harvested and not self.is_goal:
+            harvested_text = render_text(18, "Harvested", (255, 0, 0))
+            surface.blit(harvested_text, (screen_pos.x - self.radius, screen_pos.y - self.radius - 25))
+
+class Asteroid(PhysicsObject):
+    __slots__ = ('color', 'inertia_resistance', 'original_velocity')
+    def __init__(self, x, y, radius, motion_model, color, rng=random):
+        super().__init__(x, y, radius, motion_model)
+        self.color = color
+        self.mass = (self.radius ** 2) * 1000
+        self.velocity = pygame.Vector2(rng.uniform(-1, 1), rng.uniform(1, 25))
+        self.inertia_resistance = 0.95
+        self.original_velocity = pygame.Vector2(self.velocity)
+
+    def begin_update(self, world):
+        self.original_velocity.update(self.velocity)
+        super().begin_update(world)
+
+    def end_update(self, world):
+        self.velocity *= 1 - self.inertia_resistance
+        self.velocity += self.original_velocity * self.inertia_resistance
+
+    def draw(self, surface, camera_offset):
+        screen_pos = self.position - camera_offset
+        pygame.draw.circle(surface, self.color, (int(screen_pos.x), int(screen_pos.y)), self.radius)
+        pygame.draw.circle(surface, (0, 0, 0), (int(screen_pos.x), int(screen_pos.y)), self.radius, 1)
+
+class EnemyShip(PhysicsBody):
+    __slots__ = ('color', 'speed', 'aristotle_speed', 'fuel', 'hull', 'detection_radius', 'pursuing')
+    draw_margin = 30
+
+    def __init__(self, x, y, motion_model):
+        super().__init__(x, y, 10, motion_model)
+        self.color = (255, 0, 0)
+        self.mass = 200
+        self.speed = 2
+        self.aristotle_speed = 0.2
+        self.thrusting = True
+        self.natural = True
+        self.fuel = 100
+        self.hull = 100
+        self.detection_radius = 500
+        self.pursuing = False
+
+    def begin_update(self, world):
+        if not BATCHED_PHYSICS: # the batched path steers every enemy at once in steer_enemies
+            self.steer(world.nearest_ship(self.position))
+        super().begin_update(world)
+
+    def steer(self, ship):
+        distance_to_player = (ship.position - self.position).length()
+        self.pursuing = distance_to_player <= self.detection_radius
+        
+        if self.pursuing and self.fuel > 0:
+            direction = (ship.position - self.position)
+            if direction.length_squared() > 0:
+                direction = direction.normalize()
+                self.angle = math.degrees(math.atan2(direction.x, -direction.y))
+                
+                if isinstance(self.motion_model, AristotelianMotion):
+                    self.acceleration = direction * self.aristotle_speed
+                    self.thrusting = True
+                else:
+                    self.velocity = direction * self.speed
+                self.fuel = max(0, self.fuel - 0.025)
+        else:
+            if not isinstance(self.motion_model, AristotelianMotion):
+                self.velocity *= 0.98
+
+    def draw(self, surface, camera_offset):
+        origin = self.position - camera_offset
+        rotated_points = [p.rotate(self.angle) + origin for p in SHIP_POINTS]
+        pygame.draw.polygon(surface, self.color, rotated_points)
+
+        if self.velocity.length_squared() > 0:
+            rotated_flame = [p.rotate(self.angle) + origin for p in FLAME_POINTS]
+            pygame.draw.polygon(surface, (255, 165, 0), rotated_flame)
+
+        bar_width = 40
+        bar_height = 5
+
+        fuel_bar_x = self.position.x - camera_offset.x - bar_width // 2
+        fuel_bar_y = self.position.y - camera_offset.y - self.radius - 15
+        pygame.draw.rect(surface, (255, 0, 0), (fuel_bar_x, fuel_bar_y, bar_width, bar_height))
+        pygame.draw.rect(surface, (0, 255, 0), (fuel_bar_x, fuel_bar_y, bar_width * (self.fuel/100), bar_height))
+
+        hull_bar_y = self.position.y - camera_offset.y - self.radius - 25
+        pygame.draw.rect(surface, (255, 0, 0), (fuel_bar_x, hull_bar_y, bar_width, bar_height))
+        pygame.draw.rect(surface, (255, 255, 0), (fuel_bar_x, hull_bar_y, bar_width * (self.hull/100), bar_height))
+
+    def take_damage(self, collision_force):
+        self.hull = max(0, self.hull - collision_force * 10)
+
+def steer_enemies(enemies, ships):
+    # EnemyShip.steer for all enemies at once, each against its nearest ship: detection,
+    # pursuit direction and angle, fuel burn and the Aristotelian/other velocity rules are
+    # array operations, and only the enemies whose state changes get written back
+    n = len(enemies)
+    if n == 0:
+        return
+    pos = gather_vectors(enemies, 'position')
+    fuel = np.fromiter((e.fuel for e in enemies), dtype=float, count=n)
+    detection = np.fromiter((e.detection_radius for e in enemies), dtype=float, count=n)
+    aristotelian = np.fromiter((isinstance(e.motion_model, AristotelianMotion) for e in enemies), dtype=bool, count=n)
+
+    targets = gather_vectors(ships, 'position')
+    deltas = targets[:, None, :] - pos[None, :, :]
+    nearest = np.argmin(np.einsum('ijk,ijk->ij', deltas, deltas), axis=0)
+    delta = deltas[nearest, np.arange(n)]
+    distance = np.sqrt(delta[:, 0] * delta[:, 0] + delta[:, 1] * delta[:, 1])
+    pursuing = distance <= detection
+    active = pursuing & (fuel > 0)
+    chasing = np.flatnonzero(active & (distance > 0))
+    direction = delta[chasing] / distance[chasing, None]
+    angles = np.arctan2(direction[:, 0], -direction[:, 1]) * (180 / math.pi)
+    burned = np.maximum(0.0, fuel[chasing] - 0.025)
+
+    for e, flag in zip(enemies, pursuing.tolist()):
+        e.pursuing = flag
+    for i, (dx, dy), angle, left in zip(chasing.tolist(), direction.tolist(), angles.tolist(), burned.tolist()):
+        e = enemies[i]
+        e.angle = angle
+        if aristotelian[i]:
+            e.acceleration = pygame.Vector2(dx * e.aristotle_speed, dy * e.aristotle_speed)
+            e.thrusting = True
+        else:
+            e.velocity = pygame.Vector2(dx * e.speed, dy * e.speed)
+        e.fuel = left
+    for i in np.flatnonzero(~active & ~aristotelian).tolist():
+        enemies[i].velocity *= 0.98
+
+PROJECTILE_POOL_SIZE = 256
+
+class ProjectilePool:
+    # live shots are packed into slots [0, count) of parallel arrays
+    def __init__(self, capacity=PROJECTILE_POOL_SIZE):
+        self.capacity = capacity
+        self.radius = 3
+        self.speed = 8
+        self.damage = 25
+        self.max_lifetime = 600 #in frames
+        self.position = np.zeros((capacity, 2))
+        self.previous_position = np.zeros((capacity, 2))
+        self.velocity = np.zeros((capacity, 2))
+        self.lifetime = np.zeros(capacity, dtype=int)
+        self.models = np.zeros(capacity, dtype=object)
+        self.count = 0
+        self.visible_count = 0
+
+    def __len__(self):
+        return self.count
+
+    def spawn(self, x, y, angle, motion_model):
+        if self.count < self.capacity:
+            slot = self.count
+            self.count += 1
+        else:
+            slot = int(np.argmin(self.lifetime[:self.count])) # pool full, recycle the oldest shot
+        rad = math.radians(angle)
+        self.position[slot] = self.previous_position[slot] = (x, y)
+        self.velocity[slot] = (math.sin(rad) * self.speed, -math.cos(rad) * self.speed)
+        self.lifetime[slot] = self.max_lifetime
+        self.models[slot] = motion_model
+
+    def expire(self):
+        n = self.count
+        alive = self.lifetime[:n] > 0
+        kept = int(alive.sum())
+        if kept < n:
+            self.position[:kept] = self.position[:n][alive]
+            self.previous_position[:kept] = self.previous_position[:n][alive]
+            self.velocity[:kept] = self.velocity[:n][alive]
+            self.lifetime[:kept] = self.lifetime[:n][alive]
+            self.models[:kept] = self.models[:n][alive]
+            self.models[kept:n] = None
+            self.count = kept
+
+    def update(self, world):
+        self.expire()
+        n = self.count
+        if n == 0:
+            return
+        self.previous_position[:n] = self.position[:n]
+        sources = world.gravity_sources()
+        no_thrust = np.zeros(n, dtype=bool)
+        dt = 1.0 / world.substeps
+        for model in set(self.models[:n]):
+            idx = np.flatnonzero(self.models[:n] == model)
+            pos, vel = self.position[idx], self.velocity[idx]
+            for _ in range(world.substeps):
+                pos, vel, _ = model.integrate(pos, vel, np.zeros((len(idx), 2)),
+                                              no_thrust[idx], sources, world.max_speed, dt)
+            self.position[idx] = pos
+            self.velocity[idx] = vel
+        self.lifetime[:n] -= 1
+
+    def collide(self, bodies):
+        # one distance test for every (shot, body) pair; each shot stops at the first body it
+        # touches, and the handles of the bodies hit come back, one per shot
+        n = self.count
+        if n == 0 or not bodies:
+            return []
+        body_pos, _ = gather_sources(bodies)
+        radii = np.array([b.radius for b in bodies], dtype=float) + self.radius
+        delta = body_pos[None, :, :] - self.position[:n, None, :]
+        hits = np.einsum('ijk,ijk->ij', delta, delta) < radii ** 2
+        shots = np.flatnonzero(hits.any(axis=1))
+        self.lifetime[shots] = 0
+        return [bodies[i].handle for i in hits[shots].argmax(axis=1)]
+
+    def draw(self, surface, camera_offset):
+        width, height = surface.get_size()
+        screen_pos = self.position[:self.count] - (camera_offset.x, camera_offset.y)
+        r = self.radius
+        on_screen = ((screen_pos[:, 0] >= -r) & (screen_pos[:, 0] <= width + r) &
+                     (screen_pos[:, 1] >= -r) & (screen_pos[:, 1] <= height + r))
+        self.visible_count = int(on_screen.sum())
+        for x, y in screen_pos[on_screen]:
+            pygame.draw.circle(surface, (255, 255, 0), (int(x), int(y)), self.radius)
+
+motion_newton = NewtonianMotion()
+motion_buridan = BuridanMotion()
+motion_aristotle = AristotelianMotion()
+PHYSICS_MODELS = [motion_newton, motion_buridan, motion_aristotle]
+
+class SpatialGrid:
+    # uniform grid over body bounding boxes: bodies are binned into every cell they touch
+    def __init__(self, bodies, cell_size=BROADPHASE_CELL_SIZE):
+        self.cell_size = cell_size
+        self.bodies = list(bodies)
+        self.cells = {}
+        for index, body in enumerate(self.bodies):
+            x, y, r = body.position.x, body.position.y, body.radius
+            for cell in self.cells_in(x - r, y - r, x + r, y + r):
+                self.cells.setdefault(cell, []).append(index)
+
+    def cells_in(self, left, top, right, bottom):
+        size = self.cell_size
+        for cx in range(int(left // size), int(right // size) + 1):
+            for cy in range(int(top // size), int(bottom // size) + 1):
+                yield (cx, cy)
+
+    def pairs(self):
+        # only bodies sharing a cell can touch
+        pairs = set()
+        for members in self.cells.values():
+            for n, i in enumerate(members):
+                for j in members[n + 1:]:
+                    pairs.add((i, j))
+        return sorted(pairs)
+
+    def query(self, left, top, right, bottom):
+        found = set()
+        for cell in self.cells_in(left, top, right, bottom):
+            found.update(self.cells.get(cell, ()))
+        return [self.bodies[i] for i in sorted(found) if self.bodies[i].alive]
+
+class PlanetIndex:
+    # planets never move, so their centres are binned once per sector; nearest() searches
+    # rings of cells outwards from the query and stops once no farther ring can hold anything
+    # closer. With drop_harvested, harvested planets are discarded as they are reported (or
+    # met) so lookups only visit live candidates.
+    def __init__(self, planets, drop_harvested=True, cell_size=PLANET_INDEX_CELL_SIZE):
+        self.cell_size = cell_size
+        self.drop_harvested = drop_harvested
+        self.cells = {}
+        self.count = 0
+        self.bounds = None
+        for planet in planets:
+            self.add(planet)
+
+    def cell_of(self, position):
+        return int(position.x // self.cell_size), int(position.y // self.cell_size)
+
+    def add(self, planet):
+        x, y = cell = self.cell_of(planet.position)
+        self.cells.setdefault(cell, []).append(planet)
+        self.count += 1
+        if self.bounds is None:
+            self.bounds = [x, y, x, y]
+        else:
+            b = self.bounds
+            b[0], b[1], b[2], b[3] = min(b[0], x), min(b[1], y), max(b[2], x), max(b[3], y)
+
+    def discard(self, planet):
+        members = self.cells.get(self.cell_of(planet.position))
+        if members and planet in members:
+            members.remove(planet)
+            self.count -= 1
+
+    def ring(self, cx, cy, ring):
+        if ring == 0:
+            yield cx, cy
+            return
+        for x in range(cx - ring, cx + ring + 1):
+            yield x, cy - ring
+            yield x, cy + ring
+        for y in range(cy - ring + 1, cy + ring):
+            yield cx - ring, y
+            yield cx + ring, y
+
+    def nearest(self, position, skip=None):
+        if self.count == 0:
+            return None
+        cx, cy = self.cell_of(position)
+        left, top, right, bottom = self.bounds
+        reach = max(cx - left, right - cx, cy - top, bottom - cy)
+        best = None
+        best_distance = math.inf
+        for ring in range(reach + 1):
+            for cell in self.ring(cx, cy, ring):
+                members = self.cells.get(cell)
+                if not members:
+                    continue
+                for planet in members[:]:
+                    if self.drop_harvested and planet.harvested:
+                        members.remove(planet)
+                        self.count -= 1
+                        continue
+                    if planet is skip:
+                        continue
+                    distance = position.distance_to(planet.position)
+                    if distance < best_distance:
+                        best, best_distance = planet, distance
+            # everything in ring + 1 and beyond is at least ring * cell_size away
+            if best_distance <= ring * self.cell_size:
+                break
+        return best
+
+MAX_DRAW_MARGIN = max(Ship.draw_margin, Planet.draw_margin, EnemyShip.draw_margin)
+
+def poisson_disk_planets(rng, count, min_distance, radius_range=(50, 150), margin=100, attempts=30,
+                         size=(PLAYING_FIELD_WIDTH, PLAYING_FIELD_HEIGHT)):
+    # Bridson-style sampling over a background grid: every planet keeps at least min_distance
+    # between its surface and its neighbours', and sampling stops when the field is full
+    # instead of retrying forever
+    low, high = radius_range
+    left, top = margin, margin
+    right, bottom = size[0] - margin, size[1] - margin
+    cell = (min_distance + 2 * low) / math.sqrt(2) # no two planets can share a cell
+    span = int(math.ceil((min_distance + 2 * high) / cell))
+    grid = {}
+    planets = []
+    active = []
+
+    def fits(x, y, radius):
+        cx, cy = int(x // cell), int(y // cell)
+        for gx in range(cx - span, cx + span + 1):
+            for gy in range(cy - span, cy + span + 1):
+                index = grid.get((gx, gy))
+                if index is not None:
+                    px, py, pr = planets[index]
+                    if math.hypot(x - px, y - py) <= min_distance + pr + radius:
+                        return False
+        return True
+
+    def add(x, y, radius):
+        grid[(int(x // cell), int(y // cell))] = len(planets)
+        active.append(len(planets))
+        planets.append((x, y, radius))
+
+    if count > 0:
+        add(rng.randint(left, right), rng.randint(top, bottom), rng.randint(low, high))
+    while active and len(planets) < count:
+        slot = rng.randrange(len(active))
+        px, py, pr = planets[active[slot]]
+        for _ in range(attempts):
+            radius = rng.randint(low, high)
+            separation = min_distance + pr + radius
+            angle = rng.uniform(0, 2 * math.pi)
+            distance = rng.uniform(separation, 2 * separation)
+            x = int(px + math.cos(angle) * distance)
+            y = int(py + math.sin(angle) * distance)
+            if left <= x <= right and top <= y <= bottom and fits(x, y, radius):
+                add(x, y, radius)
+                break
+        else:
+            active[slot] = active[-1]
+            active.pop()
+    return planets
+
+_sector_worker = None
+
+def sector_worker():
+    global _sector_worker
+    if _sector_worker is None:
+        _sector_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sector")
+    return _sector_worker
+
+def forget_sector_worker():
+    # a forked child inherits the executor but not its thread, so anything it submitted would
+    # never run; it starts its own on first use instead
+    global _sector_worker
+    _sector_worker = None
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=forget_sector_worker)
+
+class EntityStore:
+    # dense body list plus (index, generation) handles that go stale once a body despawns;
+    # despawns are queued and the list is compacted once per frame in flush()
+    def __init__(self, bodies=()):
+        self.bodies = []
+        self.slots = []
+        self.generations = []
+        self.free = []
+        self.pending = []
+        for body in bodies:
+            self.spawn(body)
+
+    def spawn(self, body):
+        if self.free:
+            index = self.free.pop()
+            self.slots[index] = body
+        else:
+            index = len(self.slots)
+            self.slots.append(body)
+            self.generations.append(0)
+        body.handle = (index, self.generations[index])
+        body.alive = True
+        self.bodies.append(body)
+        return body.handle
+
+    def get(self, handle):
+        index, generation = handle
+        if index < len(self.slots) and self.generations[index] == generation:
+            return self.slots[index]
+        return None
+
+    def despawn(self, handle):
+        # queue the body behind handle for the next flush; False if the handle is stale
+        # (the body is already gone) or the body is already queued
+        body = self.get(handle)
+        if body is None or not body.alive:
+            return False
+        body.alive = False
+        self.pending.append(body)
+        return True
+
+    def flush(self):
+        if not self.pending:
+            return False
+        for body in self.pending:
+            index, _ = body.handle
+            self.slots[index] = None
+            self.generations[index] += 1
+            self.free.append(index)
+        self.pending.clear()
+        self.bodies[:] = [body for body in self.bodies if body.alive]
+        return True
+
+class Sector:
+    def __init__(self, planets, asteroids, enemy_ships, starting_planet, goal_planet, streamer=None):
+        self.planets = planets
+        self.asteroids = asteroids
+        self.enemy_ships = enemy_ships
+        self.starting_planet = starting_planet
+        self.goal_planet = goal_planet
+        self.streamer = streamer
+
+# a frozen body is one row: kind, x, y, vx, vy, radius, angle, r, g, b, fuel, oxygen, ore, hull, harvested, is_shop
+FROZEN_KINDS = ['planet', 'asteroid', 'enemy']
+FROZEN_WIDTH = 16
+
+def freeze_body(body):
+    kind = FROZEN_KINDS.index('planet' if isinstance(body, Planet) else 'asteroid' if isinstance(body, Asteroid) else 'enemy')
+    return (kind, body.position.x, body.position.y, body.velocity.x, body.velocity.y, body.radius, body.angle,
+            *body.color, getattr(body, 'fuel', 0), getattr(body, 'oxygen', 0), getattr(body, 'ore', 0),
+            getattr(body, 'hull', 0), getattr(body, 'harvested', False), getattr(body, 'is_shop', False))
+
+def thaw_body(row, motion_model):
+    kind, x, y, vx, vy, radius, angle, r, g, b, fuel, oxygen, ore, hull, harvested, is_shop = row
+    kind = FROZEN_KINDS[int(kind)]
+    color = (int(r), int(g), int(b))
+    if kind == 'planet':
+        body = Planet(x, y, int(radius), motion_model, color, rng=_thaw_random)
+        if is_shop:
+            body.setup_as_shop()
+        body.color = color
+        body.fuel, body.oxygen, body.ore, body.harvested = fuel, oxygen, ore, bool(harvested)
+    elif kind == 'asteroid':
+        body = Asteroid(x, y, int(radius), motion_model, color, rng=_thaw_random)
+    else:
+        body = EnemyShip(x, y, motion_model)
+        body.fuel, body.hull = fuel, hull
+    body.velocity = pygame.Vector2(vx, vy)
+    body.angle = angle
+    return body
+
+_thaw_random = random.Random(0) # the constructors draw starting resources; thawing overwrites them
+
+class FrozenChunk:
+    # compact stand-in for a chunk out of range: its bodies as rows of floats. A chunk that
+    # bodies drifted into before it was ever built is frozen with built=False, so loading it
+    # still generates its own content alongside them
+    def __init__(self, rows, built=True):
+        self.rows = rows
+        self.built = built
+
+class ChunkStreamer:
+    # endless sectors: space is cut into CHUNK_SIZE squares, each built from its own seed on
+    # the sector worker as the ship approaches. Only chunks within active_radius of the ship's
+    # chunk are simulated. Chunks falling out of range are frozen to arrays, and past
+    # frozen_limit the least recently frozen are dropped and rebuilt fresh if revisited, so
+    # memory and per-step cost stay flat however far the ship travels.
+    def __init__(self, seed, levels_completed, active_radius=CHUNK_ACTIVE_RADIUS,
+                 prefetch_radius=CHUNK_PREFETCH_RADIUS, frozen_limit=CHUNK_FROZEN_LIMIT, prefetch=True):
+        self.seed = seed
+        self.prefetch = prefetch # False builds every chunk on the calling thread as it is loaded
+        self.levels_completed = levels_completed
+        self.active_radius = active_radius
+        self.prefetch_radius = max(prefetch_radius, active_radius)
+        self.frozen_limit = frozen_limit
+        self.active = {} # chunk -> its live bodies
+        self.pending = {} # chunk -> future of its freshly built bodies
+        self.frozen = OrderedDict()
+        self.center = None
+
+    @staticmethod
+    def chunk_of(position):
+        return (math.floor(position[0] / CHUNK_SIZE), math.floor(position[1] / CHUNK_SIZE))
+
+    def around(self, center, radius):
+        cx, cy = center
+        return [(x, y) for x in range(cx - radius, cx + radius + 1) for y in range(cy - radius, cy + radius + 1)]
+
+    def build(self, key):
+        rng = random.Random(f"{self.seed}-chunk-{key[0]}-{key[1]}")
+        x0, y0 = key[0] * CHUNK_SIZE, key[1] * CHUNK_SIZE
+        model = motion_newton
+        bodies = []
+        # half the spacing as margin keeps planets in neighbouring chunks (and the pinned
+        # start and goal planets on chunk corners) apart as well
+        margin = MIN_PLANET_DISTANCE // 2 + 150
+        for x, y, radius in poisson_disk_planets(rng, CHUNK_PLANETS, MIN_PLANET_DISTANCE, margin=margin,
+                                                 size=(CHUNK_SIZE, CHUNK_SIZE)):
+            color = (rng.randint(50, 255), rng.randint(50, 255), rng.randint(50, 255))
+            bodies.append(Planet(x0 + x, y0 + y, radius, model, color, rng=rng))
+        if bodies and rng.random() < CHUNK_SHOP_CHANCE:
+            rng.choice(bodies).setup_as_shop()
+        for _ in range(CHUNK_ASTEROIDS):
+            x, y = rng.randint(0, CHUNK_SIZE - 1), rng.randint(0, CHUNK_SIZE - 1)
+            bodies.append(Asteroid(x0 + x, y0 + y, rng.randint(10, 30), model, (128, 128, 128), rng=rng))
+        for _ in range(CHUNK_ENEMY_SHIPS + self.levels_completed // 2):
+            x, y = rng.randint(0, CHUNK_SIZE - 1), rng.randint(0, CHUNK_SIZE - 1)
+            bodies.append(EnemyShip(x0 + x, y0 + y, model))
+        return bodies
+
+    def load(self, key, motion_model):
+        frozen = self.frozen.pop(key, None)
+        bodies = []
+        if frozen is None or not frozen.built:
+            future = self.pending.pop(key, None)
+            bodies = future.result() if future else self.build(key)
+            for body in bodies:
+                body.motion_model = motion_model
+        if frozen is not None:
+            bodies += [thaw_body(row, motion_model) for row in frozen.rows.tolist()]
+        return bodies
+
+    def freeze(self, key, bodies, built):
+        rows = np.array([freeze_body(b) for b in bodies], dtype=float).reshape(-1, FROZEN_WIDTH)
+        frozen = self.frozen.pop(key, None)
+        if frozen is not None:
+            rows = np.concatenate([frozen.rows, rows])
+            built = built or frozen.built
+        if built and key in self.pending:
+            self.pending.pop(key).cancel()
+        self.frozen[key] = FrozenChunk(rows, built)
+
+    def update(self, position, motion_model):
+        # True when the set of simulated bodies changed
+        center = self.chunk_of(position)
+        if center == self.center:
+            return False
+        wanted = set(self.around(center, self.active_radius))
+        # bodies wander, so rebin what is live by where it is now
+        moved = {}
+        for key in sorted(self.active):
+            for body in self.active[key]:
+                if body.alive:
+                    moved.setdefault(self.chunk_of(body.position), []).append(body)
+        active = {}
+        for key in sorted(set(moved) | set(self.active)):
+            if key in wanted:
+                active[key] = moved.get(key, [])
+            else:
+                self.freeze(key, moved.get(key, []), key in self.active)
+        for key in sorted(wanted):
+            if key not in self.active:
+                active[key] = self.load(key, motion_model) + active.get(key, [])
+        self.active = active
+        self.center = center
+
+        for key in self.around(center, self.prefetch_radius) if self.prefetch else ():
+            frozen = self.frozen.get(key)
+            if key not in active and key not in self.pending and not (frozen and frozen.built):
+                self.pending[key] = sector_worker().submit(self.build, key)
+        for key in [k for k in self.pending if max(abs(k[0] - center[0]), abs(k[1] - center[1])) > self.prefetch_radius]:
+            self.pending.pop(key).cancel()
+        while len(self.frozen) > self.frozen_limit:
+            self.frozen.popitem(last=False)
+        return True
+
+    def bodies(self):
+        return [body for key in sorted(self.active) for body in self.active[key]]
+
+class GameWorld:
+    # one sector's worth of simulation state; inputs are sets of action names:
+    # held 'left', 'right', 'thrust', 'thrust_down', 'thrust_up', 'shoot', 'refill'
+    # and one-shot 'select_1'..'select_5' (buy an upgrade when docked at a shop, else 1-3 pick physics)
+    # and 'restart' (only read on the game over screen).
+    # self.ship is always there; add_ship() brings in more for co-op, and step() then takes a
+    # dict from each ship to its inputs. Ships share a fate: losing any one ends the run,
+    # except a parked one (see park_ship), which nobody is flying.
+    def __init__(self, seed=None, num_planets=NUM_PLANETS, num_asteroids=NUM_ASTEROIDS,
+                 num_enemy_ships=NUM_ENEMY_SHIPS, max_enemy_ships=MAX_ENEMY_SHIPS,
+                 min_planet_distance=MIN_PLANET_DISTANCE, prefetch=True, substeps=1,
+                 gravity_solver=GRAVITY_SOLVER, theta=BARNES_HUT_THETA, massive_sources_only=False, endless=False,
+                 sleeping=False):
+        self.num_planets = num_planets
+        self.num_asteroids = num_asteroids
+        self.num_enemy_ships = num_enemy_ships
+        self.max_enemy_ships = max_enemy_ships
+        self.min_planet_distance = min_planet_distance
+        self.prefetch = prefetch # build the next sector on a worker thread while this one is played
+        self.prefetched = None
+        self.substeps = substeps # integrator passes per step on the batched path, each covering 1/substeps of a frame
+        self.gravity_solver = gravity_solver
+        self.theta = theta
+        self.massive_sources_only = massive_sources_only # only bodies of MASSIVE_SOURCE_MASS and up pull
+        self.endless = endless # unbounded sectors streamed in chunks, see ChunkStreamer
+        self.sleeping = sleeping # let distant asteroids and enemies sleep, see update_sleep
+        self.asleep_count = 0
+        self.timer = None # anything with a phase(name) context manager, see benchmark.py
+        self.reset(seed)
+
+    def phase(self, name):
+        return self.timer.phase(name) if self.timer else nullcontext()
+
+    def gravity_sources(self):
+        bodies = self.all_bodies
+        if self.massive_sources_only:
+            bodies = [b for b in bodies if b.mass >= MASSIVE_SOURCE_MASS]
+        return GravitySources(*gather_sources(bodies), self.gravity_solver, self.theta)
+
+    @property
+    def max_speed(self):
+        if len(self.ships) == 1:
+            return self.ship.max_speed
+        return max(ship.max_speed for ship in self.ships)
+
+    def reset(self, seed=None):
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.current_motion_model = motion_newton
+        self.levels_completed = 0
+        self.frame = 0
+        self.game_over = False
+        self.restarts = 0
+        self.sector_base_seed = self.random.getrandbits(64)
+        self.ship = Ship(self.current_motion_model)
+        self.ships = [self.ship]
+        self.generate_new_level(True)
+
+    def restart(self):
+        self.game_over = False
+        self.generate_new_level(True)
+
+    def sector_seed(self, kind, n):
+        # every sector gets its own stream so it can be built ahead of time without
+        # depending on how much of self.random the current sector has used up
+        return f"{self.sector_base_seed}-{kind}-{n}"
+
+    def generate_new_level(self, levelOne=False):
+        if levelOne:
+            self.restarts += 1
+            seed = self.sector_seed('restart', self.restarts)
+        else:
+            self.levels_completed += 1
+            seed = self.sector_seed('level', self.levels_completed)
+
+        sector = None
+        if self.prefetched is not None:
+            key, future = self.prefetched
+            self.prefetched = None
+            if key == seed:
+                sector = future.result()
+            else:
+                future.cancel()
+        if sector is None:
+            sector = self.build_sector(seed, self.levels_completed, levelOne)
+        self.install_sector(sector)
+
+        if self.prefetch:
+            next_seed = self.sector_seed('level', self.levels_completed + 1)
+            future = sector_worker().submit(self.build_sector, next_seed, self.levels_completed + 1, False)
+            self.prefetched = (next_seed, future)
+
+    def build_sector(self, seed, levels_completed, levelOne):
+        if self.endless:
+            return self.build_endless_sector(seed, levels_completed)
+        rng = random.Random(seed)
+        model = motion_newton
+        planets = []
+        asteroids = []
+        enemy_ships = []
+
+        for x, y, radius in poisson_disk_planets(rng, self.num_planets, self.min_planet_distance):
+            color = (rng.randint(50, 255), rng.randint(50, 255), rng.randint(50, 255))
+            planets.append(Planet(x, y, radius, model, color, rng=rng))
+
+        if not levelOne and rng.choice([True, False]):
+            starting_planet = Planet(PLAYING_FIELD_WIDTH // 2, 200, 150, model, (150, 75, 0), rng=rng)
+            goal_planet_x = rng.randint(100, PLAYING_FIELD_WIDTH - 100)
+            goal_planet = Planet(goal_planet_x, PLAYING_FIELD_HEIGHT - 200, 150, model, (0, 255, 0), True, rng=rng)
+        else:
+            starting_planet = Planet(PLAYING_FIELD_WIDTH // 2, PLAYING_FIELD_HEIGHT - 200, 150, model, (150, 75, 0), rng=rng)
+            goal_planet_x = rng.randint(100, PLAYING_FIELD_WIDTH - 100)
+            goal_planet = Planet(goal_planet_x, 200, 150, model, (0, 255, 0), True, rng=rng)
+
+        planets.append(starting_planet)
+        planets.append(goal_planet)
+
+        for _ in range(self.num_asteroids):
+            x = rng.randint(100, PLAYING_FIELD_WIDTH - 100)
+            y = rng.randint(100, PLAYING_FIELD_HEIGHT - 100)
+            radius = rng.randint(10, 30)
+            asteroids.append(Asteroid(x, y, radius, model, (128, 128, 128), rng=rng))
+
+        base_enemies = self.num_enemy_ships
+        bonus_enemies = levels_completed * 2
+        total_enemies = min(base_enemies + bonus_enemies, self.max_enemy_ships)
+        for _ in range(total_enemies):
+            x = rng.randint(100, PLAYING_FIELD_WIDTH - 100)
+            y = rng.randint(100, PLAYING_FIELD_HEIGHT - 100)
+            enemy_ships.append(EnemyShip(x, y, model))
+
+        valid_planets = [p for p in planets if p != starting_planet and p != goal_planet]
+        if valid_planets:
+            rng.choice(valid_planets).setup_as_shop()
+
+        return Sector(planets, asteroids, enemy_ships, starting_planet, goal_planet)
+
+    def build_endless_sector(self, seed, levels_completed):
+        # the start and goal planets sit on chunk corners, clear of every chunk's own planets,
+        # and stay simulated wherever the ship is
+        rng = random.Random(seed)
+        model = motion_newton
+        starting_planet = Planet(0, 0, 150, model, (150, 75, 0), rng=rng)
+        goal_x = rng.randint(-ENDLESS_GOAL_DISTANCE // 3, ENDLESS_GOAL_DISTANCE // 3) * CHUNK_SIZE
+        goal_planet = Planet(goal_x, -ENDLESS_GOAL_DISTANCE * CHUNK_SIZE, 150, model, (0, 255, 0), True, rng=rng)
+        streamer = ChunkStreamer(seed, levels_completed, prefetch=self.prefetch)
+        streamer.update(starting_planet.position, model)
+        bodies = streamer.bodies()
+        planets = [starting_planet, goal_planet] + [b for b in bodies if isinstance(b, Planet)]
+        asteroids = [b for b in bodies if isinstance(b, Asteroid)]
+        enemy_ships = [b for b in bodies if isinstance(b, EnemyShip)]
+        return Sector(planets, asteroids, enemy_ships, starting_planet, goal_planet, streamer)
+
+    def install_sector(self, sector):
+        self.planets = sector.planets
+        self.asteroids = sector.asteroids
+        self.enemy_ships = sector.enemy_ships
+        self.starting_planet = sector.starting_planet
+        self.goal_planet = sector.goal_planet
+        self.streamer = sector.streamer
+        for slot, ship in enumerate(self.ships):
+            self.place_ship(ship, slot)
+        self.store = EntityStore(self.planets + self.asteroids + self.enemy_ships + self.ships)
+        self.all_bodies = self.store.bodies
+        for body in self.all_bodies:
+            body.motion_model = self.current_motion_model
+        self.grid = None
+        self.visible_count = self.total_count = len(self.all_bodies)
+        self.index_planets()
+
+    def place_ship(self, ship, slot=0):
+        # land the ship on the starting planet facing away from it: the first one at the top
+        # (or bottom) of the planet, the others spread out either side SHIP_SPACING apart
+        planet = self.starting_planet
+        if planet.position.y == 200:
+            normal, angle = pygame.Vector2(0, 1), 180
+        else:
+            normal, angle = pygame.Vector2(0, -1), 0
+        turn = SHIP_SPACING * ((slot + 1) // 2) * (1 if slot % 2 else -1)
+        ship.position = planet.position + normal.rotate(turn) * (planet.radius + ship.radius)
+        ship.angle = angle + turn
+        ship.previous_position = pygame.Vector2(ship.position)
+        ship.velocity = pygame.Vector2(0, 0)
+        ship.acceleration = pygame.Vector2(0, 0)
+        ship.landed = True
+        ship.current_planet = planet
+        ship.fuel = 100
+        ship.oxygen = 100
+        ship.hull = 100
+
+    def add_ship(self):
+        # another player's ship, landed next to the others on the starting planet
+        ship = Ship(self.current_motion_model)
+        self.place_ship(ship, len(self.ships))
+        self.ships.append(ship)
+        self.store.spawn(ship)
+        self.visible_count = self.total_count = len(self.all_bodies)
+        return ship
+
+    def remove_ship(self, ship):
+        if ship is self.ship:
+            raise ValueError("the world's own ship cannot be removed")
+        self.ships.remove(ship)
+        self.store.despawn(ship.handle)
+        self.flush_despawns()
+
+    def park_ship(self, ship):
+        # nobody is flying it for now: land it back on the starting planet, where it no
+        # longer counts towards game over and enemies stop chasing it
+        self.place_ship(ship, self.ships.index(ship))
+        ship.parked = True
+
+    def unpark_ship(self, ship):
+        self.place_ship(ship, self.ships.index(ship))
+        ship.parked = False
+
+    def crew(self):
+        # the ships in play: every ship but the parked ones, or all of them if all are parked
+        if len(self.ships) == 1:
+            return self.ships
+        flying = [ship for ship in self.ships if not ship.parked]
+        return flying or self.ships
+
+    def nearest_ship(self, position):
+        if len(self.ships) == 1:
+            return self.ship
+        return min(self.crew(), key=lambda ship: position.distance_squared_to(ship.position))
+
+    def index_planets(self):
+        self.planet_index = PlanetIndex(p for p in self.planets if p is not self.starting_planet and not p.harvested)
+        self.shop_index = PlanetIndex((p for p in self.planets if p.is_shop), drop_harvested=False)
+
+    def docked_at_shop(self, ship=None):
+        ship = ship or self.ship
+        return bool(ship.landed and ship.current_planet and ship.current_planet.is_shop)
+
+    def closest_unharvested_planet(self):
+        ship = self.ship
+        return self.planet_index.nearest(ship.position, skip=ship.current_planet)
+
+    def nearest_shop(self):
+        return self.shop_index.nearest(self.ship.position)
+
+    def update_sleep(self):
+        # a body sleeps once it has been far from the ship for SLEEP_FRAMES steps, and wakes
+        # when the ship comes back within WAKE_DISTANCE or a shot closes in; collisions and
+        # physics switches wake bodies elsewhere. Sleepers still pull on everything else.
+        bodies = self.asteroids + self.enemy_ships
+        if not bodies:
+            self.asleep_count = 0
+            return
+        pos = gather_vectors(bodies, 'position')
+        distance2 = None
+        for ship in self.crew(): # distance to the nearest ship
+            delta = pos - (ship.position.x, ship.position.y)
+            d2 = delta[:, 0] * delta[:, 0] + delta[:, 1] * delta[:, 1]
+            distance2 = d2 if distance2 is None else np.minimum(distance2, d2)
+        asleep = np.fromiter((b.asleep for b in bodies), dtype=bool, count=len(bodies))
+        wake = asleep & (distance2 < WAKE_DISTANCE ** 2)
+        shots = np.concatenate([ship.projectiles.position[:ship.projectiles.count] for ship in self.ships])
+        sleepers = np.flatnonzero(asleep & ~wake)
+        if len(shots) and len(sleepers):
+            gap = pos[sleepers, None, :] - shots[None, :, :]
+            near_shot = (np.einsum('ijk,ijk->ij', gap, gap) < SHOT_WAKE_DISTANCE ** 2).any(axis=1)
+            wake[sleepers[near_shot]] = True
+        far = distance2 > SLEEP_DISTANCE ** 2
+        count = 0
+        for body, is_far, woken in zip(bodies, far.tolist(), wake.tolist()):
+            if woken:
+                body.asleep = False
+                body.far_frames = 0
+            elif is_far:
+                body.far_frames += 1
+                if body.far_frames >= SLEEP_FRAMES:
+                    body.asleep = True
+            else:
+                body.far_frames = 0
+            count += body.asleep
+        self.asleep_count = count
+
+    def wake_touched(self):
+        # sleepers stay out of the collision grid (they are well off screen, so out of the
+        # drawing index too) unless something awake and moving touches them this step
+        movers = [b for b in self.all_bodies if not b.asleep and not b.static]
+        sleepers = [b for b in self.all_bodies if b.asleep]
+        if movers and sleepers:
+            gap = gather_vectors(sleepers, 'position')[:, None, :] - gather_vectors(movers, 'position')[None, :, :]
+            reach = (np.array([b.radius for b in sleepers], dtype=float)[:, None] +
+                     np.array([b.radius for b in movers], dtype=float)[None, :])
+            touching = (np.einsum('ijk,ijk->ij', gap, gap) < reach * reach).any(axis=1)
+            for i in np.flatnonzero(touching).tolist():
+                sleepers[i].asleep = False
+                sleepers[i].far_frames = 0
+        return [b for b in self.all_bodies if not b.asleep]
+
+    def wake_all(self):
+        for body in self.all_bodies:
+            body.asleep = False
+            body.far_frames = 0
+        self.asleep_count = 0
+
+    def update_bodies(self):
+        bodies = self.all_bodies
+        enemies = self.enemy_ships
+        if self.sleeping:
+            self.update_sleep()
+            if self.asleep_count:
+                bodies = [b for b in bodies if not b.asleep]
+                enemies = [e for e in enemies if not e.asleep]
+        if not BATCHED_PHYSICS:
+            for body in bodies:
+                body.update(self)
+            return
+        steer_enemies(enemies, self.crew())
+        for body in bodies:
+            body.begin_update(self)
+        groups = {}
+        for body in bodies:
+            if not body.static:
+                groups.setdefault(body.motion_model, []).append(body)
+        dt = 1.0 / self.substeps
+        for _ in range(self.substeps):
+            for model, group in groups.items():
+                model.apply_batch(group, self, dt)
+        for body in bodies:
+            body.end_update(self)
+
+    def step(self, inputs=()):
+        # inputs is the action set for self.ship, or a dict from ship to action set once
+        # add_ship() has brought in others; a ship left out of the dict gets no input
+        inputs = inputs if isinstance(inputs, dict) else {self.ship: inputs}
+        if self.game_over:
+            if any('restart' in held for held in inputs.values()):
+                self.restart()
+            return
+        self.frame += 1
+        all_bodies = self.all_bodies
+        for body in all_bodies:
+            body.previous_position.update(body.position)
+
+        for ship in self.ships:
+            held = inputs.get(ship, ())
+            for i, upgrade in enumerate(SHOP_UPGRADES):
+                if f'select_{i + 1}' not in held:
+                    continue
+                if self.docked_at_shop(ship):
+                    ship.buy_upgrade(upgrade)
+                elif i < len(PHYSICS_MODELS):
+                    if self.current_motion_model is not PHYSICS_MODELS[i]:
+                        self.wake_all()
+                    self.current_motion_model = PHYSICS_MODELS[i]
+
+        if not any(self.docked_at_shop(ship) for ship in self.ships):
+            for body in all_bodies:
+                body.motion_model = self.current_motion_model
+                body.impetus.update(0, 0)
+
+        for ship in self.ships:
+            held = inputs.get(ship, ())
+            if 'left' in held: ship.rotate(-1)
+            if 'right' in held: ship.rotate(1)
+            if 'thrust' in held: ship.apply_thrust()
+            else: ship.stop_thrust()
+            if 'thrust_down' in held: ship.thrust_force = max(ship.thrust_force_min, ship.thrust_force - ship.thrust_force_step)
+            if 'thrust_up' in held: ship.thrust_force = min(ship.thrust_force_max, ship.thrust_force + ship.thrust_force_step)
+            if 'shoot' in held: ship.shoot()
+            if 'refill' in held:
+                ship.fuel = ship.max_fuel
+                ship.oxygen = 100
+                ship.hull = ship.max_hull
+
+        with self.phase('physics'):
+            self.update_bodies()
+
+        for ship in self.ships:
+            if ship.parked:
+                continue
+            if ship.oxygen <= 0:
+                if ship.oxygen_out_since is None:
+                    ship.oxygen_out_since = self.frame
+                elif self.frame - ship.oxygen_out_since >= OXYGEN_GRACE_FRAMES:
+                    self.game_over = True
+            else:
+                ship.oxygen_out_since = None
+
+            if ship.hull <= 0:
+                self.game_over = True
+
+        for ship in self.ships:
+            if ship.position.distance_to(self.goal_planet.position) < self.goal_planet.radius + ship.radius:
+                self.generate_new_level()
+                return
+
+        if isinstance(self.current_motion_model, AristotelianMotion):
+            for body in all_bodies:
+                body.thrusting = False
+                body.acceleration.update(0, 0)
+
+        with self.phase('projectiles'):
+            self.update_projectiles()
+
+        with self.phase('collision'):
+            self.resolve_collisions()
+
+        for ship in self.ships:
+            held = inputs.get(ship, ())
+            if ship.landed and 'thrust' in held:
+                ship.take_off()
+            elif 'thrust' in held:
+                ship.apply_thrust()
+            else:
+                ship.stop_thrust()
+
+        self.flush_despawns()
+        if self.streamer:
+            self.stream()
+
+    def stream(self):
+        # the ship crossed into another chunk: swap in the bodies now in range
+        if not self.streamer.update(self.ship.position, self.current_motion_model):
+            return
+        bodies = self.streamer.bodies()
+        self.planets = [self.starting_planet, self.goal_planet] + [b for b in bodies if isinstance(b, Planet)]
+        self.asteroids = [b for b in bodies if isinstance(b, Asteroid)]
+        self.enemy_ships = [b for b in bodies if isinstance(b, EnemyShip)]
+        self.store = EntityStore(self.planets + self.asteroids + self.enemy_ships + self.ships)
+        self.all_bodies = self.store.bodies
+        self.grid = None
+        self.index_planets()
+
+    def flush_despawns(self):
+        if self.store.flush():
+            self.asteroids[:] = [a for a in self.asteroids if a.alive]
+            self.enemy_ships[:] = [e for e in self.enemy_ships if e.alive]
+
+    def update_projectiles(self):
+        targets = None
+        for ship in self.ships:
+            ship.projectiles.update(self)
+            if targets is None and ship.projectiles.count:
+                targets = [b for b in self.all_bodies if not isinstance(b, Ship)]
+            self.resolve_projectile_hits(ship, targets)
+
+    def resolve_projectile_hits(self, ship, targets):
+        # co-op shots pass through every ship, the shooter's own included
+        if not targets:
+            return
+        for handle in ship.projectiles.collide(targets):
+            body = self.store.get(handle)
+            if isinstance(body, EnemyShip):
+                body.hull -= ship.projectiles.damage
+                if body.hull <= 0:
+                    self.store.despawn(handle)
+
+    @contextmanager
+    def interpolated(self, alpha):
+        # show bodies and shots alpha of the way from where the last step started to where it
+        # ended; the simulation's own vectors and arrays are swapped back afterwards
+        if alpha >= 1:
+            yield
+            return
+        pools = [ship.projectiles for ship in self.ships]
+        saved = [body.position for body in self.all_bodies]
+        saved_shots = [pool.position for pool in pools]
+        for body in self.all_bodies:
+            body.position = body.previous_position.lerp(body.position, alpha)
+        for pool in pools:
+            pool.position = pool.previous_position + (pool.position - pool.previous_position) * alpha
+        try:
+            yield
+        finally:
+            for body, position in zip(self.all_bodies, saved):
+                body.position = position
+            for pool, position in zip(pools, saved_shots):
+                pool.position = position
+
+    def visible_bodies(self, left, top, width, height):
+        # bodies whose drawn extent overlaps the view, in all_bodies order; the grid
+        # built by this frame's collision pass doubles as the index
+        if self.grid is None:
+            self.grid = SpatialGrid(self.all_bodies)
+        margin = MAX_DRAW_MARGIN
+        right, bottom = left + width, top + height
+        visible = []
+        for body in self.grid.query(left - margin, top - margin, right + margin, bottom + margin):
+            reach = body.radius + body.draw_margin
+            x, y = body.position.x, body.position.y
+            if x + reach >= left and x - reach <= right and y + reach >= top and y - reach <= bottom:
+                visible.append(body)
+        self.visible_count = len(visible)
+        self.total_count = len(self.all_bodies)
+        return visible
+
+    def resolve_collisions(self):
+        bodies = self.all_bodies
+        if self.asleep_count:
+            bodies = self.wake_touched()
+        self.grid = SpatialGrid(bodies)
+        collision_bodies = self.grid.bodies
+        for i, j in self.grid.pairs():
+            a, b = collision_bodies[i], collision_bodies[j]
+            if not (a.alive and b.alive): continue
+            if a.check_collision(b):
+                if (isinstance(a, EnemyShip) and isinstance(b, Ship)):
+                    b.take_damage(a.velocity.length())
+                    self.store.despawn(a.handle)
+                    continue
+                if (isinstance(b, EnemyShip) and isinstance(a, Ship)):
+                    a.take_damage(b.velocity.length())
+                    self.store.despawn(b.handle)
+                    continue
+
+                if isinstance(a, Asteroid) or isinstance(b, Asteroid):
+                    if isinstance(a, Ship):
+                        a.take_damage(1) # Dont know whats up with  this but it does a lot more damage than it should
+                    if isinstance(b, Ship):
+                        b.take_damage(1)
+                    if isinstance(a, Asteroid):
+                        self.store.despawn(a.handle)
+                    if isinstance(b, Asteroid):
+                        self.store.despawn(b.handle)
+                    continue 
+
+                if isinstance(a, Ship) and isinstance(b, Planet) and not a.landed:
+                    delta = b.position - a.position
+                    direction = delta.normalize()
+                    ship_bottom_direction = pygame.Vector2(-math.sin(math.radians(a.angle)), math.cos(math.radians(a.angle)))
+                    alignment = ship_bottom_direction.dot(direction)
+                    distance_to_surface = delta.length() - (a.radius + b.radius)
+                    if abs(distance_to_surface) < 10 and alignment > 0.75:
+                        a.land(b)
+                        self.planet_index.discard(b)
+                elif isinstance(b, Ship) and isinstance(a, Planet) and not b.landed:
+                    delta = a.position - b.position
+                    direction = delta.normalize()
+                    ship_bottom_direction = pygame.Vector2(-math.sin(math.radians(b.angle)), math.cos(math.radians(b.angle)))
+                    alignment = ship_bottom_direction.dot(direction)
+                    distance_to_surface = delta.length() - (a.radius + b.radius)
+                    if abs(distance_to_surface) < 10 and alignment > 0.75:
+                        b.land(a)
+                        self.planet_index.discard(a)
+
+                delta = b.position - a.position
+                direction = delta.normalize() if delta.length_squared() != 0 else pygame.Vector2(1, 0)
+                overlap = (a.radius + b.radius) - delta.length()
+                if overlap > 0:
+                    correction = direction * (overlap / 2)
+                    if not isinstance(a, Planet):
+                        a.position -= correction
+                    if not isinstance(b, Planet):
+                        b.position += correction
+
+                rel_vel = b.velocity - a.velocity
+                vel_along_normal = rel_vel.dot(direction)
+                if vel_along_normal <= 0:
+                    if isinstance(self.current_motion_model, (NewtonianMotion, BuridanMotion)):
+                        impulse_mag = (4 * vel_along_normal) / (a.mass + b.mass)
+                        impulse = impulse_mag * direction
+                        if not isinstance(a, Planet):
+                            a.velocity += impulse * b.mass
+                        if not isinstance(b, Planet):
+                            b.velocity -= impulse * a.mass
+                        collision_force = abs(vel_along_normal)
+                        if isinstance(a, Ship):
+                            a.take_damage(collision_force)
+                        if isinstance(b, Ship):
+                            b.take_damage(collision_force)
+                        if isinstance(a, Ship):
+                            a.rotate(self.random.choice([-1, 1]) * self.random.randint(5, 15))
+                        if isinstance(b, Ship):
+                            b.rotate(self.random.choice([-1, 1]) * self.random.randint(5, 15))
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="run the simulation headless, without a display")
+    parser.add_argument("--steps", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--inputs", default="", help="comma separated actions held every step, e.g. thrust,shoot")
+    parser.add_argument("--substeps", type=int, default=1)
+    parser.add_argument("--gravity", choices=['direct', 'barnes_hut'], default=GRAVITY_SOLVER)
+    parser.add_argument("--theta", type=float, default=BARNES_HUT_THETA)
+    parser.add_argument("--massive-only", action="store_true", help="only planets and asteroids pull")
+    parser.add_argument("--asteroids", type=int, default=NUM_ASTEROIDS)
+    parser.add_argument("--endless", action="store_true", help="stream chunks of an unbounded sector")
+    parser.add_argument("--sleep", action="store_true", help="let distant asteroids and enemies sleep")
+    args = parser.parse_args()
+
+    world = GameWorld(args.seed, substeps=args.substeps, num_asteroids=args.asteroids, gravity_solver=args.gravity,
+                      theta=args.theta, massive_sources_only=args.massive_only, endless=args.endless,
+                      sleeping=args.sleep)
+    held = set(filter(None, args.inputs.split(",")))
+    start = time.perf_counter()
+    for _ in range(args.steps):
+        if world.game_over:
+            world.restart()
+        world.step(held)
+    elapsed = time.perf_counter() - start
+    print(f"{args.steps} steps in {elapsed:.2f}s ({args.steps / elapsed:.0f} steps/s), "
+          f"level {world.levels_completed}, {len(world.all_bodies)} bodies, {world.asleep_count} asleep")